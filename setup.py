@@ -11,7 +11,7 @@ setup(
     install_requires=[
         "matplotlib>=3.0.0",
         "numpy>=1.7,<2.0",
-        "scipy>=0.19.1",
+        "scipy>=1.4.0",
         "pandas>=0.25.0",
     ],
     packages=["bplot"],
@@ -1,45 +1,312 @@
 from bplot.check_data import check_data
 import numpy as np
+from scipy import fft as sp_fft
 
 
 def _autocorrelation(x):
+    """Autocorrelation of each series along the last axis of x."""
     # https://lingpipe-blog.com/2012/06/08/autocorrelation-fft-kiss-eigen/
     # https://github.com/stan-dev/math/blob/5f6e8ddd100f00ddf5163c7082ecda077b1e8770/stan/math/prim/mat/fun/autocorrelation.hpp
-    centered_signal = x - np.mean(x)
-    N = x.size
-    M = int(2 ** np.ceil(np.log2(N)) - N)
-
-    freqvec = np.abs(np.fft.fft(centered_signal, N + M)) ** 2
-    ac = np.fft.ifft(freqvec)[:N]
-
-    return np.real(ac / ac[0])
+    ac = _lagged_products(x)
+    return ac / ac[..., :1]
 
 
 def _autocovariance(x):
-    # TODO(ear) test these
+    """Autocovariance of each series along the last axis of x."""
     # https://github.com/stan-dev/math/blob/develop/test/unit/math/prim/mat/fun/autocovariance_test.cpp
-    ac = autocorrelation(x)
-    N = x.size
-    return ac * np.var(x) * (N - 1) / N
+    return _lagged_products(x) / x.shape[-1]
+
+
+def _lagged_products(x):
+    """Sums of lagged products of the centered series along the last axis
+    of x.  Real FFTs are padded to a fast length of at least 2N - 1, so
+    that the circular correlation does not wrap around."""
+    N = x.shape[-1]
+    size = sp_fft.next_fast_len(2 * N - 1, real=True)
+    centered = x - np.mean(x, axis=-1, keepdims=True)
+    freq = sp_fft.rfft(centered, size)
+    return sp_fft.irfft(freq.real ** 2 + freq.imag ** 2, size)[..., :N]
+
+
+def _chain_autocorrelation(x):
+    """Autocorrelation of the draws of x, shaped (..., n_chains, n_draws),
+    combining the chains as does Stan's effective sample size."""
+    M, N = x.shape[-2:]
+    acov = _autocovariance(x)
+    chain_var = acov[..., 0] * N / (N - 1)
+    mean_var = np.mean(chain_var, axis=-1)
+    var_plus = mean_var * (N - 1) / N
+    if M > 1:
+        var_plus += np.var(np.mean(x, axis=-1), axis=-1, ddof=1)
+    rho = 1 - (mean_var[..., None] - np.mean(acov, axis=-2)) / var_plus[..., None]
+    rho[..., 0] = 1
+    return rho
+
+
+class AutocorrelationPlan:
+    """Autocorrelations of many series of one length.
+
+    The transform size is chosen once, for series of length `n` and type
+    `dtype`, and the zero-padded input and the power spectrum are kept in
+    buffers reused by every call of the same shape.  The forward and
+    inverse transforms still allocate their outputs, as `scipy.fft` has
+    no way to write into given arrays.  A plan's buffers are shared by its
+    calls, so use one plan per thread.
+
+    Parameters
+    ----------
+    n : int
+        The length of each series.
+
+    dtype : numpy.dtype, numpy.float64 by default
+        The floating point type of the computation, numpy.float32 or
+        numpy.float64.
+
+    Examples
+    --------
+    >>> plan = AutocorrelationPlan(1000)
+    >>> for draws in chains:
+    ...     rho = plan(draws)
+    """
+
+    def __init__(self, n, dtype=np.float64):
+        if n < 2:
+            raise ValueError("n must be at least 2")
+        self.n = int(n)
+        self.dtype = np.dtype(dtype)
+        if self.dtype not in (np.float32, np.float64):
+            raise ValueError("dtype must be numpy.float32 or numpy.float64")
+        self.size = sp_fft.next_fast_len(2 * self.n - 1, real=True)
+        self._buffers = {}
+
+    def __call__(self, x):
+        """Autocorrelation of x, shaped (n,) or (m, n), along its last axis."""
+        ac = self._lagged_products(x)
+        ac /= ac[..., :1].copy()
+        return ac
 
+    def covariance(self, x):
+        """Autocovariance of x, shaped (n,) or (m, n), along its last axis."""
+        ac = self._lagged_products(x)
+        ac /= self.n
+        return ac
 
-def autocorrelation(x, color="tab:blue", alpha=1, label="", ax=None, **kws):
-    """Draw lag plot.
+    def _lagged_products(self, x):
+        x = np.asarray(x, dtype=self.dtype)
+        if x.ndim not in (1, 2) or x.shape[-1] != self.n:
+            raise ValueError("x must be shaped (n,) or (m, n), with n = %d" % self.n)
+
+        shape = x.shape[:-1]
+        if shape not in self._buffers:
+            # the padding of the input buffer stays zero across calls
+            self._buffers[shape] = (
+                np.zeros(shape + (self.size,), dtype=self.dtype),
+                np.empty(shape + (self.size // 2 + 1,), dtype=self.dtype),
+            )
+        padded, power = self._buffers[shape]
+
+        mean = np.add.reduce(x, axis=-1, keepdims=True)
+        mean /= self.n
+        np.subtract(x, mean, out=padded[..., : self.n])
+
+        # the transforms allocate their outputs; the power spectrum is
+        # re ** 2 + im ** 2, squared in place in the spectrum and summed
+        # into its buffer, and the spectrum is freed before the inverse
+        # transform so that its memory is reused
+        parts = sp_fft.rfft(padded, axis=-1).view(self.dtype)
+        np.square(parts, out=parts)
+        np.add(parts[..., 0::2], parts[..., 1::2], out=power)
+        del parts
+        return sp_fft.irfft(power, self.size, axis=-1)[..., : self.n]
+
+
+class AutocorrelationStream:
+    """Autocorrelation up to a bounded lag of draws as they arrive.
+
+    Only the first and last `max_lag` draws and the sums of lagged
+    products are kept, so memory and the time per draw are O(max_lag),
+    however long the stream.  The draws are shifted by the first one
+    before their products are summed, which keeps the sums well
+    conditioned for draws far from zero.
 
     Parameters
     ----------
-    x : {numpy.array, pandas.core.series.Series}
-        The location along the x-axis at which the vertical box is placed.
+    max_lag : int
+        The largest lag tracked.
+
+    Examples
+    --------
+    >>> stream = AutocorrelationStream(50)
+    >>> for draws in sampler:
+    ...     stream.update(draws)
+    ...     autocorrelation(stream)
+    """
+
+    def __init__(self, max_lag):
+        if max_lag < 1:
+            raise ValueError("max_lag must be at least 1")
+        self.max_lag = int(max_lag)
+        self.count = 0
+        self._shift = None
+        self._sum = 0.0
+        self._products = np.zeros(self.max_lag + 1)
+        self._head = np.zeros(0)
+        self._tail = np.zeros(0)
+
+    def update(self, x):
+        """Add the draws x, in order, and return the stream."""
+        x = np.asarray(x, dtype=float).ravel()
+        if x.size == 0:
+            return self
+        if self._shift is None:
+            self._shift = x[0]
+        x = x - self._shift
+
+        # the new draws times each of the max_lag draws before them
+        recent = np.concatenate([self._tail, x])
+        start, stop = self._tail.size, recent.size
+        for k in range(min(self.max_lag, stop - 1) + 1):
+            first = max(start, k)
+            self._products[k] += np.dot(recent[first:], recent[first - k : stop - k])
+
+        self.count += x.size
+        self._sum += x.sum()
+        missing = self.max_lag - self._head.size
+        if missing > 0:
+            self._head = np.concatenate([self._head, x[:missing]])
+        self._tail = recent[-self.max_lag :].copy()
+        return self
+
+    def snapshot(self):
+        """Autocorrelation of the draws so far, at lags 0 to max_lag, as
+        `_autocorrelation` would compute it from all of them."""
+        n = self.count
+        if n < 2:
+            raise ValueError("the stream must have at least 2 draws")
+        k = np.arange(min(self.max_lag, n - 1) + 1)
+        mean = self._sum / n
+
+        # sums of the draws at lags k from the start and from the end
+        first = np.concatenate([[0], np.cumsum(self._head)])[k]
+        last = np.concatenate([[0], np.cumsum(self._tail[::-1])])[k]
+        later, earlier = self._sum - first, self._sum - last
+
+        cov = self._products[k] - mean * (later + earlier) + (n - k) * mean ** 2
+        return cov / cov[0]
+
+
+def effective_sample_size(x, return_autocorrelation=False):
+    """Effective sample size of Markov chains.
+
+    The autocorrelations of all chains of all series are computed with one
+    batch of real FFTs, and summed over Geyer's initial monotone sequence
+    as by the current `compute_effective_sample_size` of Stan: the sum
+    stops at lag N - 4 at the latest, and the even autocorrelation
+    after the last positive pair is added once more, which reduces the
+    variance of the estimate for antithetic chains.
+
+    The sum, tau, is then bounded below by 1 / log10(M * N), for M chains
+    of N draws, as by ArviZ, so that the effective sample size is at most
+    M * N * log10(M * N).  Stan bounds the effective sample size the same
+    way, and so agrees, only while tau is positive; for strongly
+    antithetic chains tau can be negative, and there Stan returns a
+    negative effective sample size where this returns the bound.
+
+    Parameters
+    ----------
+    x : numpy.array
+        The draws, shaped (n_draws,) for one chain, (n_chains, n_draws), or
+        (n_params, n_chains, n_draws) for many parameters.
+
+    return_autocorrelation : bool, False by default
+        Whether to return the autocorrelation, combined across chains, too.
+
+    Returns
+    -------
+    ess : {float, numpy.array}
+        The effective sample size of each parameter.
+
+    rho : numpy.array
+        With `return_autocorrelation`, the (..., n_draws) autocorrelation of
+        each parameter's chains.
+
+    Examples
+    --------
+    >>> draws = np.random.normal(size=(100, 4, 1000))
+    >>> ess = effective_sample_size(draws)
+    """
+
+    x = np.asarray(x, dtype=float)
+    if x.ndim == 1:
+        x = x[None, :]
+    if x.ndim < 2 or x.shape[-1] < 4:
+        raise ValueError("x must have at least 4 draws along its last axis")
+    M, N = x.shape[-2:]
+
+    rho = _chain_autocorrelation(x)
+
+    # Geyer's initial positive sequence of sums of adjacent pairs; pairs
+    # j = 1, 2, ... are added while the one before is positive, but only
+    # up to lag N - 4, and the first pair that is not positive ends it
+    n_pairs = (N - 4) // 2 + 1
+    pairs = rho[..., : 2 * n_pairs : 2] + rho[..., 1 : 2 * n_pairs : 2]
+    ends = pairs <= 0
+    last = np.where(ends.any(axis=-1), np.argmax(ends, axis=-1), n_pairs - 1)
+    last = last[..., None]
+
+    # the positive pairs before the last, made monotone, then the even
+    # half of the last pair if that pair is not negative, and once more,
+    # to reduce the variance for antithetic chains, if it is positive
+    pairs_used = np.arange(n_pairs) < last
+    monotone = np.minimum.accumulate(pairs, axis=-1)
+    last_even = np.take_along_axis(rho, 2 * last, axis=-1)[..., 0]
+    last_pair = np.take_along_axis(pairs, last, axis=-1)[..., 0]
+    kept = (last[..., 0] == 0) | (last_pair >= 0)
+
+    tau = 2 * np.sum(np.where(pairs_used, monotone, 0), axis=-1) - 1
+    tau += 2 * np.where(kept, last_even, 0) + np.maximum(last_even, 0)
+    tau = np.maximum(tau, 1 / np.log10(M * N))
+    ess = (M * N / tau)[()]
+
+    if return_autocorrelation:
+        return ess, rho
+    return ess
+
+
+def autocorrelation(
+    x, color="tab:blue", alpha=1, label="", max_lag=None, band=True, ax=None, **kws
+):
+    """Draw autocorrelation plot.
+
+    The autocorrelation at each lag is drawn as a vertical stem from zero,
+    all stems as a single `LineCollection`.
+
+    Parameters
+    ----------
+    x : {numpy.array, pandas.core.series.Series, bplot.AutocorrelationStream}
+        The vector of data, in order, for which the autocorrelation is sought.
+        A (n_chains, n_draws) array of Markov chains draws their
+        autocorrelation combined across chains, as in
+        `effective_sample_size`, and a stream draws its snapshot.
 
-    # TODO(ear) complete doc
     color : string, 'tab:blue' by default
-        The color of the box.
+        The color of the stems.
+
+    alpha : float, 1 by default
+        The transparency of the color.  Values between 0 (transparent) and 1 (opague) are allowed.
 
     label : string, '' (empty) by default
         The label within a potential legend.
 
+    max_lag : int, None by default
+        The largest lag drawn.  If None, all lags up to len(x) - 1 are drawn.
+
+    band : bool, True by default
+        Whether to shade the band of +/- 1.96 / sqrt(x.size) within which
+        the autocorrelations of white noise fall 95% of the time.
+
     ax : matplotlib.pyplot.Axes, None by default
-        The axis onto which the box is drawn.  If left as None,
+        The axis onto which the autocorrelation is drawn.  If left as None,
         matplotlib.pyplot.gca() is called to get the current `Axes`.
 
 
@@ -47,23 +314,42 @@ def autocorrelation(x, color="tab:blue", alpha=1, label="", ax=None, **kws):
     -------
 
     out : matplotlib.pyplot.Axes
-        The `Axes` onto which the box was drawn.
+        The `Axes` onto which the autocorrelation was drawn.
     """
 
-    x, _, ax = check_data(x, None, ax)
-
-    acor = _autocorrelation(x)
-
-    # TODO(ear) add standard error bars, 1.96/sqrt(len(X))
-    for i, ac in np.ndenumerate(acor):
-        # TODO(ear) add v/hline
-        if ac >= 0:
-            ax.vlines(
-                i[0] + 1, ymin=0, ymax=ac, color=color, alpha=alpha, label=label, **kws
+    if isinstance(x, AutocorrelationStream):
+        _, _, ax = check_data(None, None, ax)
+        acor, n = x.snapshot(), x.count
+    else:
+        x, _, ax = check_data(x, None, ax)
+        if x.ndim > 2:
+            raise ValueError(
+                "x must be a vector or a (n_chains, n_draws) array; plot the "
+                "parameters of a (n_params, n_chains, n_draws) array one by one"
             )
+        n = x.size
+        if x.ndim == 2:
+            _, acor = effective_sample_size(x, return_autocorrelation=True)
         else:
-            ax.vlines(
-                i[0] + 1, ymin=ac, ymax=0, color=color, alpha=alpha, label=label, **kws
-            )
+            acor = _autocorrelation(x)
+    if max_lag is not None:
+        acor = acor[: max_lag + 1]
+    lags = np.arange(acor.size)
+
+    if band:
+        bound = 1.96 / np.sqrt(n)
+        ax.fill_between(
+            [0, lags[-1]], -bound, bound, color=color, alpha=0.2 * alpha, linewidth=0
+        )
+
+    ax.vlines(
+        lags,
+        ymin=np.minimum(acor, 0),
+        ymax=np.maximum(acor, 0),
+        color=color,
+        alpha=alpha,
+        label=label,
+        **kws
+    )
 
     return ax
@@ -6,8 +6,15 @@
 
 # THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
 
+from concurrent.futures import ProcessPoolExecutor
+import functools
+import os
+
 import numpy as np
 
+# the most N * N * max_blocks for which max_blocks is enforced exactly
+_EXACT_BLOCKS_WORK = 2 ** 26
+
 
 class FitnessFunc(object):
     """Base class for fitness functions
@@ -84,6 +91,17 @@ class Events(FitnessFunc):
             return 4 - np.log(73.53 * self.p0 * (N ** -0.478))
 
 
+class _BinnedEvents(Events):
+    """Fitness for events counted into bins, some of which may be empty"""
+
+    def fitness(self, N_k, T_k):
+        # eq. 19 from Scargle 2012, with 0 log 0 = 0
+        with np.errstate(divide="ignore", invalid="ignore"):
+            fit = N_k * (np.log(N_k) - np.log(T_k))
+        fit[N_k == 0] = 0
+        return fit
+
+
 class RegularEvents(FitnessFunc):
     """Fitness for regular events
     This is for data which has a fundamental "tick" length, so that all
@@ -153,7 +171,18 @@ class PointMeasures(FitnessFunc):
             return 1.32 + 0.577 * np.log10(N)
 
 
-def bayesian_blocks(t, x=None, sigma=None, fitness="events", **kwargs):
+def bayesian_blocks(
+    t,
+    x=None,
+    sigma=None,
+    fitness="events",
+    method="exact",
+    grid=None,
+    return_error=False,
+    min_width=None,
+    max_blocks=None,
+    **kwargs
+):
     """Bayesian Blocks Implementation
     This is a flexible implementation of the Bayesian Blocks algorithm
     described in Scargle 2012 [1]_
@@ -182,10 +211,51 @@ def bayesian_blocks(t, x=None, sigma=None, fitness="events", **kwargs):
             then a simulation-derived prior will be used.
         Alternatively, the fitness can be a user-specified object of
         type derived from the FitnessFunc class.
+    method : str
+        the search used to find the optimal partition.
+        - 'exact' : consider every earlier cell as the start of the last
+            block, O(N^2).
+        - 'pelt' : prune candidate change points which can never again
+            start the optimal last block (Killick et al. 2012).  This
+            returns the same edges as 'exact' whenever the fitness is
+            superadditive, i.e. splitting a block never lowers its fitness,
+            which holds for all of the built-in fitness functions.  Only
+            a small fraction of the cells usually survive as candidates,
+            though the worst case remains O(N^2).
+    grid : int (optional)
+        if specified, first collapse t onto the centers of `grid` equal
+        width cells spanning the range of t, so that at most `grid` cells
+        are searched.  Counts are summed within a cell, measures are
+        averaged with inverse variance weights.  Only supported for
+        'events' and 'measures': the tick `dt` of 'regular_events' already
+        is a grid, and how to collapse the data of a user-specified
+        fitness is not known.
+    return_error : bool
+        if True, also return the largest distance any time in t was moved
+        by the `grid` quantization, half the width of a grid cell.  The
+        edges are the exact Bayesian Blocks edges of the data so moved.
+    min_width : float (optional)
+        the smallest allowed block width.  Blocks narrower than this are
+        never considered, which also narrows the search.  If the data span
+        less than `min_width`, a single block is returned.
+    max_blocks : int (optional)
+        the largest allowed number of blocks.  If the optimal partition has
+        more, for small problems, N * N * max_blocks up to about 6.7e7,
+        the optimal partition with at most `max_blocks` blocks is found
+        exactly, by keeping the best partition with each number of blocks
+        in one O(max_blocks * N^2) search.  Otherwise the result is an
+        approximation, found in about the time of the search without
+        `max_blocks`: the same exact search is run over a subset of about
+        sqrt(6.7e7 / max_blocks) cells, the change points of the optimal
+        partition and cells evenly spaced between them, and each change
+        point is then moved to its best place between its neighbours,
+        sweeping in O(N) until none moves.
     Returns
     -------
     edges : ndarray
         array containing the (N+1) bin edges
+    error : float
+        the quantization error bound, returned only if `return_error`
     Examples
     --------
     Event data:
@@ -207,14 +277,24 @@ def bayesian_blocks(t, x=None, sigma=None, fitness="events", **kwargs):
     >>> sigma = 0.1
     >>> x_obs = np.random.normal(x, sigma)
     >>> bins = bayesian_blocks(t, x=x_obs, fitness='measures')
+    Large event data sets:
+    >>> t = np.random.normal(size=100000)
+    >>> bins = bayesian_blocks(t, fitness='events', method='pelt')
+    >>> bins, error = bayesian_blocks(t, grid=4096, return_error=True)
+    Constrained blocks:
+    >>> bins = bayesian_blocks(t, method='pelt', min_width=0.05, max_blocks=20)
     References
     ----------
     .. [1] Scargle, J `et al.` (2012)
            http://adsabs.harvard.edu/abs/2012arXiv1207.5578S
+    .. [2] Killick, R, Fearnhead, P, and Eckley, I (2012)
+           http://arxiv.org/abs/1101.1438
     See Also
     --------
     astroML.plotting.hist : histogram plotting function which can make use
                             of bayesian blocks.
+    BayesianBlocks : the same computation for data arriving in chunks.
+    bayesian_blocks_batch : the same computation for many series.
     """
     # validate array input
     t = np.asarray(t, dtype=float)
@@ -223,31 +303,27 @@ def bayesian_blocks(t, x=None, sigma=None, fitness="events", **kwargs):
     if sigma is not None:
         sigma = np.asarray(sigma)
 
-    # verify the fitness function
-    if fitness == "events":
-        if x is not None and np.any(x % 1 > 0):
-            raise ValueError("x must be integer counts for fitness='events'")
-        fitfunc = Events(**kwargs)
-    elif fitness == "regular_events":
-        if x is not None and (np.any(x % 1 > 0) or np.any(x > 1)):
-            raise ValueError("x must be 0 or 1 for fitness='regular_events'")
-        fitfunc = RegularEvents(**kwargs)
-    elif fitness == "measures":
-        if x is None:
-            raise ValueError("x must be specified for fitness='measures'")
-        fitfunc = PointMeasures(**kwargs)
-    else:
-        if not (
-            hasattr(fitness, "args")
-            and hasattr(fitness, "fitness")
-            and hasattr(fitness, "prior")
-        ):
-            raise ValueError("fitness not understood")
-        fitfunc = fitness
+    _validate_x(fitness, x)
+    fitfunc = _fitness_function(fitness, **kwargs)
+
+    if method not in ("exact", "pelt"):
+        raise ValueError("method must be one of 'exact' or 'pelt'")
+    if max_blocks is not None and max_blocks < 1:
+        raise ValueError("max_blocks must be at least 1")
 
-    # find unique values of t
     t = np.array(t, dtype=float)
     assert t.ndim == 1
+
+    error = 0.0
+    if grid is not None:
+        if fitness not in ("events", "measures"):
+            raise ValueError(
+                "grid is only supported for fitness='events' or 'measures'"
+            )
+        t_range = t.min(), t.max()
+        t, x, sigma, error = _quantize(t, x, sigma, fitness, grid)
+
+    # find unique values of t
     unq_t, unq_ind, unq_inv = np.unique(t, return_index=True, return_inverse=True)
 
     # if x is not specified, x will be counts at each time
@@ -289,71 +365,660 @@ def bayesian_blocks(t, x=None, sigma=None, fitness="events", **kwargs):
     # validate the input
     fitfunc.validate_input(t, x, sigma)
 
-    # compute values needed for computation, below
+    # create length-(N + 1) array of cell edges
+    edges = np.concatenate([t[:1], 0.5 * (t[1:] + t[:-1]), t[-1:]])
+    if grid is not None:
+        # the outer cells reach out to the data, not the grid centers
+        edges[0], edges[-1] = t_range
+
+    change_points = _partition(fitfunc, edges, x, sigma, method, min_width, max_blocks)
+
+    edges = edges[change_points]
+    if return_error:
+        return edges, error
+    return edges
+
+
+def _partition(fitfunc, edges, x, sigma, method, min_width, max_blocks):
+    """Change points of the optimal partition of the cells between edges,
+    as indices into edges."""
+    N = edges.size - 1
+    cumsums = _cumulative_statistics(fitfunc, edges, x, sigma)
+
+    # arrays to store the best configuration
+    best = np.zeros(N + 1, dtype=float)
+    last = np.zeros(N, dtype=int)
+
+    candidates = np.zeros(0, dtype=int) if method == "pelt" else None
+    _search(fitfunc, edges, cumsums, best, last, 0, N, N, candidates, min_width or 0)
+    change_points = _change_points(last)
+
+    if max_blocks is None or change_points.size - 1 <= max_blocks:
+        return change_points
+    if N * N * max_blocks <= _EXACT_BLOCKS_WORK:
+        return _search_blocks(fitfunc, edges, cumsums, max_blocks, min_width or 0)
+
+    # search exactly over a subset of the change points, those just found
+    # and as many more evenly spaced cells as the budget allows, then move
+    # each change point to its best place between its neighbours
+    spaced = int(np.sqrt(_EXACT_BLOCKS_WORK / max_blocks))
+    cells = np.union1d(change_points, np.linspace(0, N, spaced + 1).astype(int))
+    merged = _search_blocks(
+        fitfunc,
+        edges[cells],
+        {k: cum[cells] for k, cum in cumsums.items()},
+        max_blocks,
+        min_width or 0,
+        cells,
+    )
+    return _refine(fitfunc, edges, cumsums, cells[merged], min_width or 0)
+
+
+def _binned_change_points(
+    counts,
+    edges,
+    fitness="events",
+    method="exact",
+    min_width=None,
+    max_blocks=None,
+    **kwargs
+):
+    """Bayesian blocks of counts already binned, as indices into edges.
+
+    Each bin is a cell spanning its own edges, so that the blocks are
+    made of whole bins wherever the bins are.  Empty bins are cells too;
+    for fitness='events' a block of only empty bins has the limiting
+    fitness 0 log 0 = 0.
+    """
+    _validate_x(fitness, counts)
+    if fitness == "events":
+        fitfunc = _BinnedEvents(**kwargs)
+    else:
+        fitfunc = _fitness_function(fitness, **kwargs)
+
+    if method not in ("exact", "pelt"):
+        raise ValueError("method must be one of 'exact' or 'pelt'")
+    if max_blocks is not None and max_blocks < 1:
+        raise ValueError("max_blocks must be at least 1")
+
+    fitfunc.validate_input(0.5 * (edges[1:] + edges[:-1]), counts, 1)
+    return _partition(fitfunc, edges, counts, 1, method, min_width, max_blocks)
+
+
+def _quantize(t, x, sigma, fitness, grid):
+    """Collapse the data onto the centers of grid equal width cells.
+
+    Returns the occupied cell centers, their values and errors, and the
+    largest distance any time was moved.
+    """
+    grid = int(grid)
+    if grid < 1:
+        raise ValueError("grid must be a positive integer")
+
+    t_min, t_max = t.min(), t.max()
+    width = (t_max - t_min) / grid
+    if width == 0:
+        width = 1.0
+    cell = np.minimum(((t - t_min) / width).astype(int), grid - 1)
+
+    # if x is not specified, x will be counts in each cell
+    counts = np.bincount(cell, minlength=grid)
+    occupied = np.flatnonzero(counts)
+    t_q = t_min + (occupied + 0.5) * width
+
+    if x is None:
+        if sigma is not None:
+            raise ValueError("If sigma is specified, x must be specified")
+        x_q = counts[occupied]
+        sigma_q = None
+    else:
+        x = np.asarray(x, dtype=float)
+        if len(t) != len(x):
+            raise ValueError("Size of t and x does not match")
+
+        if fitness == "events":
+            x_q = np.bincount(cell, weights=x, minlength=grid)[occupied]
+            sigma_q = None
+        else:
+            # inverse variance weighted mean, so that the sums of
+            # 1 / sigma^2 and x / sigma^2 over a block are unchanged
+            w = np.ones_like(x)
+            if sigma is not None:
+                w = w / np.asarray(sigma, dtype=float) ** 2
+            a = np.bincount(cell, weights=w, minlength=grid)[occupied]
+            b = np.bincount(cell, weights=w * x, minlength=grid)[occupied]
+            x_q = b / a
+            sigma_q = 1 / np.sqrt(a)
+
+    return t_q, x_q, sigma_q, 0.5 * width
+
+
+def bayesian_blocks_batch(t, x=None, sigma=None, n_jobs=1, chunksize=None, **kwargs):
+    """Bayesian Blocks for many series at once
+    Each series is handled by `bayesian_blocks` independently, optionally
+    spread over a pool of worker processes.
+    Parameters
+    ----------
+    t : sequence of array_like
+        data times, one entry per series; a list of arrays of different
+        lengths or a 2D array whose rows are the series.
+    x : sequence of array_like (optional)
+        data values, one entry (possibly None) per series
+    sigma : sequence of array_like or float (optional)
+        data errors, one entry (possibly None) per series
+    n_jobs : int or None
+        the number of worker processes.  With 1, the default, the series
+        are handled serially in this process.  With None, one worker per
+        CPU is used.
+    chunksize : int (optional)
+        the number of series sent to a worker at a time.  Defaults to
+        about four chunks per worker.
+    **kwargs
+        passed on to `bayesian_blocks`, e.g. `fitness`, `method`, `p0`
+        or `grid`.
+    Returns
+    -------
+    edges : list of ndarray
+        the bin edges of each series, in input order.  The result does
+        not depend on `n_jobs` or `chunksize`.
+    Examples
+    --------
+    >>> t = [np.random.normal(size=n) for n in (100, 500, 1000)]
+    >>> bins = bayesian_blocks_batch(t, n_jobs=2, method='pelt')
+    """
+    t = list(t)
+    n = len(t)
+
+    x = [None] * n if x is None else list(x)
+    sigma = [None] * n if sigma is None else list(sigma)
+    if len(x) != n or len(sigma) != n:
+        raise ValueError("t, x and sigma must have one entry per series")
+
+    tasks = list(zip(t, x, sigma))
+    run = functools.partial(_bayesian_blocks_task, kwargs=kwargs)
+
+    if n_jobs is None:
+        n_jobs = os.cpu_count() or 1
+    n_jobs = min(n_jobs, n)
+    if n_jobs <= 1:
+        return [run(task) for task in tasks]
+
+    if chunksize is None:
+        chunksize = max(1, -(-n // (4 * n_jobs)))
+
+    with ProcessPoolExecutor(max_workers=n_jobs) as executor:
+        return list(executor.map(run, tasks, chunksize=chunksize))
+
+
+def _bayesian_blocks_task(task, kwargs):
+    """Run bayesian_blocks on one (t, x, sigma) series in a worker."""
+    t, x, sigma = task
+    return bayesian_blocks(t, x, sigma, **kwargs)
+
+
+class BayesianBlocks(object):
+    """Incremental Bayesian Blocks for data arriving in time order.
+
+    Each call to `update` appends a chunk of data and returns the edges
+    `bayesian_blocks` would find for all of the data seen so far.  Only
+    the new cells, and the last cell seen before them, whose right edge
+    moves, are searched again.
+    Parameters
+    ----------
+    fitness : str or object
+        the fitness function to use, as for `bayesian_blocks`.
+    method : str
+        the search to use, as for `bayesian_blocks`.  Defaults to 'pelt'
+        so that the cost of an update stays roughly proportional to the
+        size of the chunk rather than to the history.
+    **kwargs
+        passed on to the fitness function, e.g. `p0`, `gamma` or `dt`.
+    Notes
+    -----
+    A prior which depends on the total number of cells, such as the
+    `gamma` prior, is evaluated with the number of cells seen when each
+    cell arrived, so the edges can differ slightly from `bayesian_blocks`
+    on the full data.  The default priors do not depend on it.
+    Examples
+    --------
+    >>> t = np.sort(np.random.normal(size=1000))
+    >>> bb = BayesianBlocks(fitness='events', p0=0.01)
+    >>> for chunk in np.array_split(t, 10):
+    ...     bins = bb.update(chunk)
+    """
+
+    def __init__(self, fitness="events", method="pelt", **kwargs):
+        if method not in ("exact", "pelt"):
+            raise ValueError("method must be one of 'exact' or 'pelt'")
+
+        self.fitness = fitness
+        self.fitfunc = _fitness_function(fitness, **kwargs)
+        self.method = method
+
+        # number of cells seen so far
+        self.n = 0
+
+        # storage for the cells, grown as needed; see _reserve
+        self._t = np.zeros(0, dtype=float)
+        self._x = np.zeros(0, dtype=float)
+        self._sigma = np.zeros(0, dtype=float)
+        self._last = np.zeros(0, dtype=int)
+        self._edges = np.zeros(1, dtype=float)
+        self._best = np.zeros(1, dtype=float)
+        keys = [k for k in ("N_k", "a_k", "b_k", "c_k") if k in self.fitfunc.args]
+        self._cumsums = {k: np.zeros(1, dtype=float) for k in keys}
+
+        # surviving block starts before the last cell was searched
+        self._candidates = np.zeros(0, dtype=int)
+
+        # change points of the optimal partition of the cells seen so far
+        self._path = np.zeros(1, dtype=int)
+
+    @property
+    def edges(self):
+        """The bin edges for all of the data seen so far."""
+        if self.n == 0:
+            return np.zeros(0, dtype=float)
+        return self._edges[self._path]
+
+    def update(self, t, x=None, sigma=None):
+        """Append data and return the updated bin edges.
+        Parameters
+        ----------
+        t : array_like
+            sorted data times, none before the last time already seen.
+        x : array_like (optional)
+            data values
+        sigma : array_like or float (optional)
+            data errors
+        Returns
+        -------
+        edges : ndarray
+            array containing the bin edges for all of the data seen so far
+        """
+        t = np.asarray(t, dtype=float)
+        if t.ndim != 1:
+            raise ValueError("t must be one dimensional")
+        if t.size == 0:
+            return self.edges
+        if np.any(np.diff(t) < 0) or (self.n and t[0] < self._t[self.n - 1]):
+            raise ValueError("t must be sorted and follow the times already seen")
+
+        _validate_x(self.fitness, x)
+
+        # if x is not specified, x will be counts at each time
+        counts = x is None
+        if counts:
+            if sigma is not None:
+                raise ValueError("If sigma is specified, x must be specified")
+            t, x = np.unique(t, return_counts=True)
+            sigma = 1
+        else:
+            x = np.asarray(x, dtype=float)
+            if len(t) != len(x):
+                raise ValueError("Size of t and x does not match")
+            if np.any(np.diff(t) == 0):
+                raise ValueError(
+                    "Repeated values in t not supported when " "x is specified"
+                )
+            if sigma is None:
+                sigma = 1
+
+        sigma = np.asarray(sigma, dtype=float)
+        if sigma.shape not in [(), (1,), t.shape]:
+            raise ValueError("sigma does not match the shape of x")
+        sigma = sigma * np.ones_like(t)
+
+        self.fitfunc.validate_input(t, x, sigma)
+
+        # search again from the last cell seen, whose right edge moves
+        k = max(self.n - 1, 0)
+        if self.n:
+            t = np.concatenate([self._t[k : k + 1], t])
+            x = np.concatenate([self._x[k : k + 1], x])
+            sigma = np.concatenate([self._sigma[k : k + 1], sigma])
+            if t[1] == t[0]:
+                if not counts:
+                    raise ValueError(
+                        "Repeated values in t not supported when " "x is specified"
+                    )
+                x[1] += x[0]
+                t, x, sigma = t[1:], x[1:], sigma[1:]
+
+        N = k + t.size
+        self._reserve(N)
+
+        self._t[k:N] = t
+        self._x[k:N] = x
+        self._sigma[k:N] = sigma
+
+        edges = self._edges
+        if k == 0:
+            edges[0] = t[0]
+        edges[k + 1 : N] = 0.5 * (t[1:] + t[:-1])
+        edges[N] = t[-1]
+
+        tail = _cumulative_statistics(self.fitfunc, edges[k : N + 1], x, sigma)
+        cumsums = {}
+        if "T_k" in self.fitfunc.args:
+            cumsums["T_k"] = edges[: N + 1]
+        for key, cum in self._cumsums.items():
+            cum[k + 1 : N + 1] = cum[k] + tail[key][1:]
+            cumsums[key] = cum[: N + 1]
+
+        best = self._best[: N + 1]
+        last = self._last[:N]
+        if self.method == "pelt":
+            candidates = _search(
+                self.fitfunc, edges, cumsums, best, last, k, N - 1, N, self._candidates
+            )
+            self._candidates = candidates.copy()
+            _search(self.fitfunc, edges, cumsums, best, last, N - 1, N, N, candidates)
+        else:
+            _search(self.fitfunc, edges, cumsums, best, last, k, N, N)
+
+        # only the blocks ending after cell k can have changed
+        self._path = _change_points(last, self._path, k)
+        self.n = N
+        return self.edges
+
+    def _reserve(self, n):
+        """Grow the storage, by doubling, to hold at least n cells."""
+        size = self._t.size
+        if n <= size:
+            return
+        size = max(n, 2 * size)
+
+        self._t = _grow(self._t, size)
+        self._x = _grow(self._x, size)
+        self._sigma = _grow(self._sigma, size)
+        self._last = _grow(self._last, size)
+        self._edges = _grow(self._edges, size + 1)
+        self._best = _grow(self._best, size + 1)
+        for key in self._cumsums:
+            self._cumsums[key] = _grow(self._cumsums[key], size + 1)
+
+
+def _grow(a, size):
+    """Copy a into the front of a zeroed array of the given size."""
+    out = np.zeros(size, dtype=a.dtype)
+    out[: a.size] = a
+    return out
+
+
+def _validate_x(fitness, x):
+    """Check that the data values x suit the named fitness function."""
+    if isinstance(fitness, str):
+        if fitness == "events":
+            if x is not None and np.any(x % 1 > 0):
+                raise ValueError("x must be integer counts for fitness='events'")
+        elif fitness == "regular_events":
+            if x is not None and (np.any(x % 1 > 0) or np.any(x > 1)):
+                raise ValueError("x must be 0 or 1 for fitness='regular_events'")
+        elif fitness == "measures":
+            if x is None:
+                raise ValueError("x must be specified for fitness='measures'")
+
+
+def _fitness_function(fitness, **kwargs):
+    """Instantiate the fitness function, unless it is already an object."""
+    if fitness == "events":
+        fitfunc = Events(**kwargs)
+    elif fitness == "regular_events":
+        fitfunc = RegularEvents(**kwargs)
+    elif fitness == "measures":
+        fitfunc = PointMeasures(**kwargs)
+    else:
+        if not (
+            hasattr(fitness, "args")
+            and hasattr(fitness, "fitness")
+            and hasattr(fitness, "prior")
+        ):
+            raise ValueError("fitness not understood")
+        fitfunc = fitness
+    return fitfunc
+
+
+def _cumulative_statistics(fitfunc, edges, x, sigma):
+    """Cumulative sums from which the block statistics are differenced.
+
+    The statistic of the block of cells i..R is ``cum[R + 1] - cum[i]``
+    for each length-(N + 1) array ``cum`` returned, keyed by the argument
+    names of ``fitfunc.fitness``.
+    """
+    cumsums = {}
+
+    # T_k: width/duration of each block
+    if "T_k" in fitfunc.args:
+        cumsums["T_k"] = edges
+
+    # N_k: number of elements in each block
+    if "N_k" in fitfunc.args:
+        cumsums["N_k"] = np.concatenate([[0], np.cumsum(x, dtype=float)])
+
+    # a_k: eq. 31
     if "a_k" in fitfunc.args:
         ak_raw = np.ones_like(x) / sigma / sigma
+        cumsums["a_k"] = 0.5 * np.concatenate([[0], np.cumsum(ak_raw)])
+
+    # b_k: eq. 32
     if "b_k" in fitfunc.args:
         bk_raw = x / sigma / sigma
+        cumsums["b_k"] = -np.concatenate([[0], np.cumsum(bk_raw)])
+
+    # c_k: eq. 33
     if "c_k" in fitfunc.args:
         ck_raw = x * x / sigma / sigma
+        cumsums["c_k"] = 0.5 * np.concatenate([[0], np.cumsum(ck_raw)])
 
-    # create length-(N + 1) array of cell edges
-    edges = np.concatenate([t[:1], 0.5 * (t[1:] + t[:-1]), t[-1:]])
-    block_length = t[-1] - edges
+    return cumsums
 
-    # arrays to store the best configuration
-    best = np.zeros(N, dtype=float)
-    last = np.zeros(N, dtype=int)
+
+def _search(
+    fitfunc,
+    edges,
+    cumsums,
+    best,
+    last,
+    start,
+    stop,
+    Ntot,
+    candidates=None,
+    min_width=0,
+):
+    """Run the dynamic program over the cells start..stop - 1.
+
+    Fills in best[start + 1 : stop + 1] and last[start:stop], where best[i]
+    is the fitness of the optimal partition of the first i cells and last[R]
+    the first cell of the last block of the optimal partition ending at R.
+    Entries before start must already be final.  Blocks narrower than
+    min_width are never considered.
+
+    With candidates None every earlier cell is a possible block start.
+    Otherwise only the given candidates are, and they are pruned as in PELT
+    (Killick et al. 2012): for a superadditive fitness, a block start i with
+    best[i] + fitness(i..R) < best[R + 1] can never beat starting a new
+    block at R + 1 once that block is at least min_width wide, so it is
+    dropped from then on.  The surviving candidates are returned.
+    """
+    if candidates is None:
+        buffers = {k: np.empty(stop, dtype=float) for k in cumsums}
+    else:
+        # the first n entries hold the surviving block starts, in order,
+        # and the right edge past which each is no longer needed; all
+        # storage is sized by the candidates, not by the cells before them
+        n = len(candidates)
+        size = n + stop - start
+        pool = np.empty(size, dtype=int)
+        pool[:n] = candidates
+        expires = np.full(size, np.inf)
+        buffers = {k: np.empty(size, dtype=float) for k in cumsums}
 
     # -----------------------------------------------------------------
     # Start with first data cell; add one cell at each iteration
     # -----------------------------------------------------------------
-    for R in range(N):
+    for R in range(start, stop):
+        # only blocks starting before cell j are at least min_width wide
+        j = R + 1
+        if min_width:
+            j = np.searchsorted(edges[: R + 1], edges[R + 1] - min_width, "right")
+
+        if candidates is not None:
+            pool[n] = R
+            expires[n] = np.inf
+            n += 1
+            alive = expires[:n] > edges[R + 1]
+            if not alive.all():
+                kept = pool[:n][alive]
+                expires[: kept.size] = expires[:n][alive]
+                n = kept.size
+                pool[:n] = kept
+            cand = pool[: np.searchsorted(pool[:n], j)]
+            j = cand.size
+
+        if j == 0:
+            best[R + 1] = -np.inf
+            last[R] = 0
+            continue
+
         # Compute fit_vec : fitness of putative last block (end at R)
         kwds = {}
+        if candidates is None:
+            for k, cum in cumsums.items():
+                buf = buffers[k][:j]
+                kwds[k] = np.subtract(cum[R + 1], cum[:j], out=buf)
+            best_start = best[:j]
+        else:
+            for k, cum in cumsums.items():
+                buf = np.take(cum, cand, out=buffers[k][:j])
+                kwds[k] = np.subtract(cum[R + 1], buf, out=buf)
+            best_start = best[cand]
+
+        # evaluate fitness function
+        fit_vec = fitfunc.fitness(**kwds)
+
+        prior = fitfunc.prior(R + 1, Ntot)
+        A_R = fit_vec - prior
+        A_R += best_start
 
-        # T_k: width/duration of each block
-        if "T_k" in fitfunc.args:
-            kwds["T_k"] = block_length[: R + 1] - block_length[R + 1]
+        i_max = np.argmax(A_R)
+        best[R + 1] = A_R[i_max]
 
-        # N_k: number of elements in each block
-        if "N_k" in fitfunc.args:
-            kwds["N_k"] = np.cumsum(x[: R + 1][::-1])[::-1]
+        if candidates is None:
+            last[R] = i_max
+        else:
+            last[R] = cand[i_max]
+            pruned = A_R + prior < best[R + 1]
+            expiring = expires[:j]
+            expiring[pruned] = np.minimum(expiring[pruned], edges[R + 1] + min_width)
 
-        # a_k: eq. 31
-        if "a_k" in fitfunc.args:
-            kwds["a_k"] = 0.5 * np.cumsum(ak_raw[: R + 1][::-1])[::-1]
+    if candidates is not None:
+        return pool[:n][expires[:n] > edges[stop]]
 
-        # b_k: eq. 32
-        if "b_k" in fitfunc.args:
-            kwds["b_k"] = -np.cumsum(bk_raw[: R + 1][::-1])[::-1]
 
-        # c_k: eq. 33
-        if "c_k" in fitfunc.args:
-            kwds["c_k"] = 0.5 * np.cumsum(ck_raw[: R + 1][::-1])[::-1]
+def _search_blocks(fitfunc, edges, cumsums, max_blocks, min_width=0, cells=None):
+    """Run the dynamic program over both the cells and the number of blocks.
 
-        # evaluate fitness function
-        fit_vec = fitfunc.fitness(**kwds)
+    best[m, i] is the fitness of the optimal partition of the first i cells
+    into exactly m blocks, -inf if there is none, and last[m - 1, R] the
+    first cell of the last block of the optimal such partition ending at
+    R.  The fitness of each putative last block is computed once per cell
+    and shared by all max_blocks rows.  Returns the change points of the
+    optimal partition into at most max_blocks blocks.
 
-        A_R = fit_vec - fitfunc.prior(R + 1, N)
-        A_R[1:] += best[:R]
+    With cells, the edges and cumsums are those at cells, the indices of
+    some of the edges of the original cells, so that each cell here is a
+    run of the original cells and the prior counts the original cells.
 
-        i_max = np.argmax(A_R)
-        last[R] = i_max
-        best[R] = A_R[i_max]
+    Every earlier cell is a possible block start: a start beaten by
+    starting a new block at R + 1 with the same number of blocks before it
+    still ends a partition with one block more, so PELT prunes nothing.
+    """
+    N = edges.size - 1
+    if cells is None:
+        cells = np.arange(N + 1)
+    rows = np.arange(max_blocks)
+    best = np.full((max_blocks + 1, N + 1), -np.inf)
+    best[0, 0] = 0
+    last = np.zeros((max_blocks, N), dtype=int)
 
-    # -----------------------------------------------------------------
-    # Now find changepoints by iteratively peeling off the last block
-    # -----------------------------------------------------------------
-    change_points = np.zeros(N, dtype=int)
-    i_cp = N
-    ind = N
-    while True:
-        i_cp -= 1
-        change_points[i_cp] = ind
-        if ind == 0:
+    buffers = {k: np.empty(N, dtype=float) for k in cumsums}
+    scores = np.empty((max_blocks, N), dtype=float)
+
+    for R in range(N):
+        # only blocks starting before cell j are at least min_width wide
+        j = R + 1
+        if min_width:
+            j = np.searchsorted(edges[: R + 1], edges[R + 1] - min_width, "right")
+        if j == 0:
+            continue
+
+        kwds = {}
+        for k, cum in cumsums.items():
+            buf = buffers[k][:j]
+            kwds[k] = np.subtract(cum[R + 1], cum[:j], out=buf)
+        fit_vec = fitfunc.fitness(**kwds) - fitfunc.prior(cells[R + 1], cells[N])
+
+        # row m - 1 holds the partitions whose last block is the m-th
+        A_R = np.add(best[:max_blocks, :j], fit_vec, out=scores[:, :j])
+        i_max = np.argmax(A_R, axis=1)
+        best[1:, R + 1] = A_R[rows, i_max]
+        last[:, R] = i_max
+
+    # the fewest blocks among equally good partitions
+    m = np.argmax(best[1:, N]) + 1
+    change_points = [N]
+    while m > 0:
+        change_points.append(last[m - 1, change_points[-1] - 1])
+        m -= 1
+    return np.array(change_points[::-1], dtype=int)
+
+
+def _refine(fitfunc, edges, cumsums, change_points, min_width=0, sweeps=10):
+    """Move each inner change point to the cell between its neighbours
+    which maximizes the fitness of the two blocks it separates, sweeping
+    until none moves, or at most sweeps times.  Each sweep is O(N)."""
+    change_points = change_points.copy()
+    N = change_points[-1]
+
+    def fitness(start, stop):
+        kwds = {k: cum[stop] - cum[start] for k, cum in cumsums.items()}
+        return fitfunc.fitness(**kwds) - fitfunc.prior(stop, N)
+
+    for _ in range(sweeps):
+        moved = False
+        for i in range(1, change_points.size - 1):
+            a, b, c = change_points[i - 1 : i + 2]
+            splits = np.arange(a + 1, c)
+            if min_width:
+                wide = (edges[splits] - edges[a] >= min_width) & (
+                    edges[c] - edges[splits] >= min_width
+                )
+                splits = splits[wide]
+            score = fitness(a, splits) + fitness(splits, c)
+            i_max = np.argmax(score)
+            if score[i_max] > score[np.searchsorted(splits, b)]:
+                change_points[i] = splits[i_max]
+                moved = True
+        if not moved:
             break
-        ind = last[ind - 1]
-    change_points = change_points[i_cp:]
+    return change_points
+
+
+def _change_points(last, path=None, final=0):
+    """Find changepoints by iteratively peeling off the last block.
 
-    return edges[change_points]
+    With path, the change points of an earlier partition whose entries of
+    last before cell final are unchanged, the peeling stops as soon as it
+    meets path at or before final, from where on the two agree.
+    """
+    change_points = [last.size]
+    ind = last.size
+    while ind != 0:
+        if path is not None and ind <= final:
+            i = np.searchsorted(path, ind)
+            if i < path.size and path[i] == ind:
+                return np.concatenate([path[:i], change_points[::-1]])
+        ind = last[ind - 1]
+        change_points.append(ind)
+    return np.array(change_points[::-1], dtype=int)
@@ -1,16 +1,62 @@
 import numpy as np
-from bplot.check_data import check_data
+from bplot.check_data import (
+    check_colors,
+    check_data,
+    check_groups,
+    check_positions,
+    oriented,
+)
 from bplot.line import line_h, line_v
 from bplot.point import point
+from bplot.summary import QuantileSketch, grouped_quantiles, summary
+from matplotlib.collections import LineCollection
+from matplotlib.colors import to_rgba_array
 
 
 def _bx(x):
     """Compute five numbers for box plot."""
-    q1, q2, q3 = np.percentile(x, [25, 50, 75])
+    x_min, q1, q2, q3, x_max = summary(x, [0, 0.25, 0.5, 0.75, 1])["quantiles"]
     iqr = q3 - q1
 
-    x_min = x.min()
-    x_max = x.max()
+    uw = q3 + iqr * 1.5
+    uw = np.clip(uw, q3, x_max)
+
+    lw = q1 - iqr * 1.5
+    lw = np.clip(lw, x_min, q1)
+
+    return q1, q2, q3, lw, uw
+
+
+def _outliers(x, lw, uw):
+    """Values of x beyond the whiskers; of a sketch, only its extremes."""
+    if isinstance(x, QuantileSketch):
+        x = np.array([x.min, x.max])
+    return x[(x > uw) | (x < lw)]
+
+
+def _check_max_outliers(max_outliers):
+    """Check that max_outliers leaves room for both extremes."""
+    if max_outliers is not None and max_outliers < 2:
+        raise ValueError("max_outliers must be None or at least 2")
+
+
+def _thin(outs, max_outliers):
+    """At most max_outliers of the outliers: the extremes and evenly spaced
+    order statistics between them.  Also returns the number left out."""
+    if max_outliers is None or outs.size <= max_outliers:
+        return outs, 0
+    outs = np.sort(outs)
+    keep = np.unique(np.round(np.linspace(0, outs.size - 1, max_outliers)))
+    return outs[keep.astype(np.intp)], outs.size - keep.size
+
+
+def _bxs(values, codes, n_groups):
+    """Compute five numbers for the box plot of each group, with one sort
+    of all values by group and then by value."""
+    x_min, q1, q2, q3, x_max = grouped_quantiles(
+        values, codes, n_groups, [0, 0.25, 0.5, 0.75, 1]
+    ).T
+    iqr = q3 - q1
 
     uw = q3 + iqr * 1.5
     uw = np.clip(uw, q3, x_max)
@@ -21,7 +67,17 @@ def _bx(x):
     return q1, q2, q3, lw, uw
 
 
-def box(x, y, color="tab:blue", label="", style="o", alpha=1.0, ax=None, **kws):
+def box(
+    x,
+    y,
+    color="tab:blue",
+    label="",
+    style="o",
+    alpha=1.0,
+    max_outliers=None,
+    ax=None,
+    **kws
+):
     """Draw vertical box plot.
 
     Parameters
@@ -29,9 +85,10 @@ def box(x, y, color="tab:blue", label="", style="o", alpha=1.0, ax=None, **kws):
     x : scalar
         The location along the x-axis at which the vertical box is placed.
 
-    y : {numpy.array, pandas.core.series.Series}
+    y : {numpy.array, pandas.core.series.Series, bplot.QuantileSketch}
         The vector of data for which the standard five number summary
-        is sought.
+        is sought, or a sketch of it.  Of a sketch, only the smallest and
+        largest values can be drawn as outliers.
 
     color : string, 'tab:blue' by default
         The color of the box.
@@ -45,6 +102,13 @@ def box(x, y, color="tab:blue", label="", style="o", alpha=1.0, ax=None, **kws):
     alpha : float, 1.0 by default
         The transparency of the color.  Values between 0 (transparent) and 1 (opague) are allowed.
 
+    max_outliers : int, None by default
+        The most outliers drawn.  Beyond it, the smallest and largest
+        outliers and evenly spaced order statistics between them are
+        drawn, and a note by the upper whisker counts those left out.  It
+        must be at least 2, for the two extremes.  If None, all outliers
+        are drawn.
+
     ax : matplotlib.pyplot.Axes, None by default
         The axis onto which the box is drawn.  If left as None,
         matplotlib.pyplot.gca() is called to get the current `Axes`.
@@ -57,32 +121,56 @@ def box(x, y, color="tab:blue", label="", style="o", alpha=1.0, ax=None, **kws):
         The `Axes` onto which the box was drawn.
     """
 
-    _, y, ax = check_data(None, y, ax)
+    _check_max_outliers(max_outliers)
+    if isinstance(y, QuantileSketch):
+        _, _, ax = check_data(None, None, ax)
+    else:
+        _, y, ax = check_data(None, y, ax)
 
     q1, q2, q3, lw, uw = _bx(y)
 
-    line_v(x, lw, uw, size=2, color=color, alpha=alpha)
-    line_v(x, q1, q3, size=5, color=color, alpha=alpha)
-
-    u_outs = y[np.where(y > uw)]
-    l_outs = y[np.where(y < lw)]
-
-    point(np.repeat(x, u_outs.size), u_outs, style="*", color=color, alpha=alpha)
-    point(np.repeat(x, l_outs.size), l_outs, style="*", color=color, alpha=alpha)
-
-    out = point(x, q2, color=color, label=label, size=2, style=style, alpha=alpha)
+    line_v(x, lw, uw, size=2, color=color, alpha=alpha, ax=ax)
+    line_v(x, q1, q3, size=5, color=color, alpha=alpha, ax=ax)
+
+    outs, dropped = _thin(_outliers(y, lw, uw), max_outliers)
+    point(np.repeat(x, outs.size), outs, style="*", color=color, alpha=alpha, ax=ax)
+    if dropped:
+        ax.annotate(
+            "{} outliers not drawn".format(dropped),
+            xy=(x, uw),
+            xytext=(8, 0),
+            textcoords="offset points",
+            va="center",
+            fontsize="small",
+            color=color,
+        )
+
+    out = point(
+        x, q2, color=color, label=label, size=2, style=style, alpha=alpha, ax=ax
+    )
     return out
 
 
-def box_h(x, y, color="tab:blue", label="", style="o", alpha=1.0, ax=None, **kws):
+def box_h(
+    x,
+    y,
+    color="tab:blue",
+    label="",
+    style="o",
+    alpha=1.0,
+    max_outliers=None,
+    ax=None,
+    **kws
+):
     """Draw horizontal box plot.
 
 
     Parameters
     ----------
-    x : {numpy.array, pandas.core.series.Series}
+    x : {numpy.array, pandas.core.series.Series, bplot.QuantileSketch}
         The vector of data for which the standard five number summary
-        is sought.
+        is sought, or a sketch of it.  Of a sketch, only the smallest and
+        largest values can be drawn as outliers.
 
     y : scalar
         The location along the x-axis at which the vertical box is placed.
@@ -99,6 +187,13 @@ def box_h(x, y, color="tab:blue", label="", style="o", alpha=1.0, ax=None, **kws
     alpha : float, 1.0 by default
         The transparency of the color.  Values between 0 (transparent) and 1 (opague) are allowed.
 
+    max_outliers : int, None by default
+        The most outliers drawn.  Beyond it, the smallest and largest
+        outliers and evenly spaced order statistics between them are
+        drawn, and a note by the upper whisker counts those left out.  It
+        must be at least 2, for the two extremes.  If None, all outliers
+        are drawn.
+
     ax : matplotlib.pyplot.Axes, None by default
         The axis onto which the box is drawn.  If left as None,
         matplotlib.pyplot.gca() is called to get the current `Axes`.
@@ -111,18 +206,200 @@ def box_h(x, y, color="tab:blue", label="", style="o", alpha=1.0, ax=None, **kws
         The `Axes` onto which the box was drawn.
     """
 
-    x, _, ax = check_data(x, None, ax)
+    _check_max_outliers(max_outliers)
+    if isinstance(x, QuantileSketch):
+        _, _, ax = check_data(None, None, ax)
+    else:
+        x, _, ax = check_data(x, None, ax)
 
     q1, q2, q3, lw, uw = _bx(x)
 
-    line_h(y, lw, uw, size=2, color=color, alpha=alpha)
-    line_h(y, q1, q3, size=5, color=color, alpha=alpha)
+    line_h(y, lw, uw, size=2, color=color, alpha=alpha, ax=ax)
+    line_h(y, q1, q3, size=5, color=color, alpha=alpha, ax=ax)
+
+    outs, dropped = _thin(_outliers(x, lw, uw), max_outliers)
+    point(outs, np.repeat(y, outs.size), style="*", color=color, alpha=alpha, ax=ax)
+    if dropped:
+        ax.annotate(
+            "{} outliers not drawn".format(dropped),
+            xy=(uw, y),
+            xytext=(0, 8),
+            textcoords="offset points",
+            ha="center",
+            fontsize="small",
+            color=color,
+        )
+
+    out = point(
+        q2, y, size=2, style=style, color=color, label=label, alpha=alpha, ax=ax
+    )
+    return out
+
+
+def boxes(x, y, by=None, colors=None, label="", style="o", alpha=1.0, ax=None, **kws):
+    """Draw vertical box plots of many groups.
+
+    All five number summaries are computed with one sort, and all groups
+    are drawn with two `LineCollection`s, for the whiskers and the boxes,
+    and two scatters, for the outliers and the medians.
+
+    Parameters
+    ----------
+    x : {numpy.array, list, None}
+        The locations along the x-axis at which the boxes are placed, one per
+        group.  It may be None, which places the groups at 1, 2, ....
+
+    y : {list, numpy.array, pandas.core.frame.DataFrame, pandas.core.series.Series}
+        The groups of data for which the standard five number summaries
+        are sought: a list of vectors, a 2D array or a DataFrame whose
+        columns are the groups, or a vector of data grouped by `by`.
+
+    by : {numpy.array, pandas.core.series.Series, string}, None by default
+        The group label of each value of `y`, or the name of the column of
+        group labels when `y` is a DataFrame with one other column.
 
-    u_outs = x[np.where(x > uw)]
-    l_outs = x[np.where(x < lw)]
+    colors : list, None by default
+        The color of each group's box, in order of the sorted group
+        labels.  If None, `bplot.colors.color` is cycled through.
+
+    label : string, '' (empty) by default
+        The label of the medians within a potential legend.
 
-    point(u_outs, np.repeat(y, u_outs.size), style="*", color=color, alpha=alpha)
-    point(l_outs, np.repeat(y, l_outs.size), style="*", color=color, alpha=alpha)
+    style : string, 'o' by default
+        The shape of the median within each box.
+
+    alpha : float, 1.0 by default
+        The transparency of the color.  Values between 0 (transparent) and 1 (opague) are allowed.
+
+    ax : matplotlib.pyplot.Axes, None by default
+        The axis onto which the boxes are drawn.  If left as None,
+        matplotlib.pyplot.gca() is called to get the current `Axes`.
+
+
+    Returns
+    -------
+
+    out : matplotlib.collections.PathCollection
+        The medians of the boxes.
+    """
+
+    return _boxes(
+        x,
+        y,
+        by,
+        colors=colors,
+        label=label,
+        style=style,
+        alpha=alpha,
+        vert=True,
+        ax=ax,
+        **kws
+    )
+
+
+def boxes_h(x, y, by=None, colors=None, label="", style="o", alpha=1.0, ax=None, **kws):
+    """Draw horizontal box plots of many groups.
+
+    All five number summaries are computed with one sort, and all groups
+    are drawn with two `LineCollection`s, for the whiskers and the boxes,
+    and two scatters, for the outliers and the medians.
+
+    Parameters
+    ----------
+    x : {list, numpy.array, pandas.core.frame.DataFrame, pandas.core.series.Series}
+        The groups of data for which the standard five number summaries
+        are sought: a list of vectors, a 2D array or a DataFrame whose
+        columns are the groups, or a vector of data grouped by `by`.
+
+    y : {numpy.array, list, None}
+        The locations along the y-axis at which the boxes are placed, one per
+        group.  It may be None, which places the groups at 1, 2, ....
+
+    by : {numpy.array, pandas.core.series.Series, string}, None by default
+        The group label of each value of `x`, or the name of the column of
+        group labels when `x` is a DataFrame with one other column.
+
+    colors : list, None by default
+        The color of each group's box, in order of the sorted group
+        labels.  If None, `bplot.colors.color` is cycled through.
+
+    label : string, '' (empty) by default
+        The label of the medians within a potential legend.
+
+    style : string, 'o' by default
+        The shape of the median within each box.
+
+    alpha : float, 1.0 by default
+        The transparency of the color.  Values between 0 (transparent) and 1 (opague) are allowed.
+
+    ax : matplotlib.pyplot.Axes, None by default
+        The axis onto which the boxes are drawn.  If left as None,
+        matplotlib.pyplot.gca() is called to get the current `Axes`.
+
+
+    Returns
+    -------
+
+    out : matplotlib.collections.PathCollection
+        The medians of the boxes.
+    """
 
-    out = point(q2, y, size=2, style=style, color=color, label=label, alpha=alpha)
+    return _boxes(
+        y,
+        x,
+        by,
+        colors=colors,
+        label=label,
+        style=style,
+        alpha=alpha,
+        vert=False,
+        ax=ax,
+        **kws
+    )
+
+
+def _boxes(positions, data, by, colors, label, style, alpha, vert, ax, **kws):
+    """Draw box plots of grouped data, along the y-axis if vert."""
+
+    values, codes, labels = check_groups(data, by)
+    _, _, ax = check_data(None, None, ax)
+    n_groups = labels.size
+
+    positions = check_positions(positions, n_groups)
+
+    colors = check_colors(colors, n_groups)
+    colors = to_rgba_array(colors)
+
+    q1, q2, q3, lw, uw = _bxs(values, codes, n_groups)
+
+    whiskers = oriented(positions[:, None], np.stack([lw, uw], axis=1), vert)
+    boxes = oriented(positions[:, None], np.stack([q1, q3], axis=1), vert)
+    ax.add_collection(
+        LineCollection(whiskers, colors=colors, linewidths=2, alpha=alpha)
+    )
+    ax.add_collection(LineCollection(boxes, colors=colors, linewidths=5, alpha=alpha))
+
+    outside = (values > uw[codes]) | (values < lw[codes])
+    outliers = oriented(positions[codes[outside]], values[outside], vert)
+    ax.scatter(
+        outliers[:, 0],
+        outliers[:, 1],
+        c=colors[codes[outside]],
+        marker="*",
+        s=6 ** 2,
+        alpha=alpha,
+    )
+
+    medians = oriented(positions, q2, vert)
+    out = ax.scatter(
+        medians[:, 0],
+        medians[:, 1],
+        c=colors,
+        label=label,
+        marker=style,
+        s=6 ** 3,
+        alpha=alpha,
+        **kws
+    )
+    ax.autoscale_view()
     return out
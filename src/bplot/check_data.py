@@ -2,6 +2,8 @@ import matplotlib.pyplot as plt
 import numpy as np
 import pandas as pd
 
+from bplot.colors import color as color_cycle
+
 
 def check_data(x=None, y=None, ax=None):
     """Check for valid data.
@@ -46,3 +48,131 @@ def check_data(x=None, y=None, ax=None):
         ax = plt.gca()
 
     return x, y, ax
+
+
+def check_groups(x, by=None):
+    """Check for valid grouped data.
+
+    Criteria x, by:
+    x a list of vectors, a 2D numpy array whose columns are the groups,
+    or a pandas DataFrame whose columns are the groups; or
+    x a vector and by a vector of group labels of the same length; or
+    x a pandas DataFrame and by the name of its column of group labels,
+    with exactly one other column of values.
+
+    Returns the values as one vector, the group index of each value, and
+    the group labels.
+    """
+
+    if by is None:
+        if isinstance(x, pd.DataFrame):
+            labels = np.asarray(x.columns)
+            groups = [x[c].values for c in x.columns]
+        elif isinstance(x, np.ndarray) and x.ndim == 2:
+            labels = np.arange(x.shape[1])
+            groups = list(x.T)
+        elif isinstance(x, (list, tuple)):
+            labels = np.arange(len(x))
+            groups = [np.asarray(g).ravel() for g in x]
+        else:
+            raise TypeError(
+                "x must be a list of vectors, a 2D np.ndarray or a pd.DataFrame, "
+                "or by must be given, but x is type {}".format(type(x))
+            )
+
+        values = np.concatenate(groups) if groups else np.zeros(0)
+        sizes = [np.size(g) for g in groups]
+        codes = np.repeat(np.arange(len(groups)), sizes)
+        return values, codes, labels
+
+    if isinstance(x, pd.DataFrame):
+        if not np.isscalar(by) or by not in x.columns:
+            raise ValueError("by must be the name of a column of x")
+        others = [c for c in x.columns if c != by]
+        if len(others) != 1:
+            raise ValueError("x must have exactly one column besides by")
+        x, by = x[others[0]], x[by]
+
+    x, by = np.asarray(x), np.asarray(by)
+    if x.shape != by.shape:
+        raise ValueError("x and by must have the same shape")
+
+    labels, codes = np.unique(by, return_inverse=True)
+    return x, codes.ravel(), labels
+
+
+def check_positions(positions, n_groups):
+    """Check for valid group positions.
+
+    Criteria positions:
+    None, for positions 1, 2, ..., n_groups; or
+    a vector of shape (n_groups,)
+
+    Returns the positions as a float vector.
+    """
+
+    if positions is None:
+        positions = np.arange(1, n_groups + 1)
+    positions = np.asarray(positions, dtype=float)
+    if positions.shape != (n_groups,):
+        raise ValueError("there must be one position per group")
+    return positions
+
+
+def check_colors(colors, n_groups):
+    """Check for group colors.
+
+    Returns colors, or if it is None one color per group, cycling through
+    bplot's colors.
+    """
+
+    if colors is None:
+        colors = [color_cycle[i % len(color_cycle)] for i in range(n_groups)]
+    return colors
+
+
+def oriented(across, along, vert):
+    """Stack coordinates across and along the groups' axis into (x, y)
+    points, the groups' axis being the y-axis if vert."""
+
+    across, along = np.broadcast_arrays(across, along)
+    return np.stack([across, along] if vert else [along, across], axis=-1)
+
+
+def check_chunks(x, chunksize=2 ** 20):
+    """Check for valid chunked data.
+
+    Criteria x:
+    a numpy array or memmap, or the path of a .npy file, read `chunksize`
+    values at a time; a list of vectors; a callable returning a new
+    iterator of vectors on each call; or an iterator of vectors.
+
+    Returns a function which starts a pass over the chunks, yielding
+    numpy arrays of shape (N,), and whether more than one pass is possible.
+    """
+
+    if isinstance(x, str):
+        x = np.load(x, mmap_mode="r")
+
+    if isinstance(x, np.ndarray):
+        flat = x.reshape(-1)
+
+        def chunks():
+            for start in range(0, flat.size, chunksize):
+                yield np.asarray(flat[start : start + chunksize], dtype=float)
+
+        return chunks, True
+
+    if callable(x):
+        factory = x
+    elif isinstance(x, (list, tuple)):
+        factory = x.__iter__
+    else:
+        factory = None
+        iterator = iter(x)
+
+    def chunks():
+        for chunk in factory() if factory is not None else iterator:
+            yield np.asarray(chunk, dtype=float).ravel()
+
+    return chunks, factory is not None
@@ -1,5 +1,11 @@
-from bplot.check_data import check_data
+from bplot.check_data import check_chunks, check_colors, check_data, check_groups
 from bplot.curve import curve
+from bplot.kde import (
+    gaussian_kde_fft,
+    gaussian_kde_fft_stream,
+    grouped_gaussian_kde_fft,
+)
+from matplotlib.collections import LineCollection
 import numpy as np
 from scipy import stats
 
@@ -13,6 +19,7 @@ def density(
     alpha=1.0,
     bw_method=None,
     n=101,
+    engine="scipy",
     ax=None,
     **kws
 ):
@@ -39,11 +46,18 @@ def density(
         The transparency of the color.  Values between 0 (transparent) and 1 (opague) are allowed.
 
     bw_method : string, None by default
-        TODO (ear) The bandwidth method used for smoothing.
+        The bandwidth method used for smoothing, as for
+        scipy.stats.gaussian_kde.  If None, 'scott' is used.
 
     n : int, 101 by default
         The number of interpolatino points.
 
+    engine : string, 'scipy' by default
+        Either 'scipy', to evaluate scipy.stats.gaussian_kde at each
+        point, or 'fft', to bin the data onto a fine grid and smooth it
+        by FFT convolution.  The 'fft' engine agrees with 'scipy' to
+        about 0.1% of the peak density and is much faster for large `x`.
+
     ax : matplotlib.pyplot.Axes, None by default
         The axis onto which the box is drawn.  If left as None,
         matplotlib.pyplot.gca() is called to get the current `Axes`.
@@ -61,15 +75,213 @@ def density(
     (x_min, x_max) = np.min(x), np.max(x)
     xs = np.linspace(x_min, x_max, n)
 
-    density = stats.kde.gaussian_kde(x, bw_method)
+    if engine == "scipy":
+        density = stats.kde.gaussian_kde(x, bw_method)(xs)
+    elif engine == "fft":
+        density = gaussian_kde_fft(x, x_min, x_max, n, bw_method)
+    else:
+        raise ValueError("engine must be one of 'scipy' or 'fft'")
+
     out = curve(
         xs,
-        density(xs),
+        density,
+        color=color,
+        label=label,
+        style=style,
+        size=size,
+        alpha=alpha,
+        ax=ax,
+        **kws
+    )
+    return out
+
+
+def densities(
+    x,
+    by=None,
+    colors=None,
+    style="-",
+    size=1.5,
+    alpha=1.0,
+    bw_method=None,
+    n=101,
+    ax=None,
+    **kws
+):
+    """Draw density plots of many groups.
+
+    All densities are evaluated on one shared grid in a single binned,
+    FFT smoothed pass, and drawn as a single `LineCollection`.
+
+    Parameters
+    ----------
+    x : {list, numpy.array, pandas.core.frame.DataFrame, pandas.core.series.Series}
+        The groups of data for which density plots are sought: a list of
+        vectors, a 2D array or a DataFrame whose columns are the groups,
+        or a vector of data grouped by `by`.
+
+    by : {numpy.array, pandas.core.series.Series, string}, None by default
+        The group label of each value of `x`, or the name of the column of
+        group labels when `x` is a DataFrame with one other column.
+
+    colors : list, None by default
+        The color of each group's density, in order of the sorted group
+        labels.  If None, `bplot.colors.color` is cycled through.
+
+    style : string, '-' by default
+        The line style of the curves.
+
+    size : float, 1.5 by default
+        The line width of the curves.
+
+    alpha : float, 1.0 by default
+        The transparency of the color.  Values between 0 (transparent) and 1 (opague) are allowed.
+
+    bw_method : string, None by default
+        The bandwidth method used for smoothing each group, as for
+        scipy.stats.gaussian_kde.  If None, 'scott' is used.
+
+    n : int, 101 by default
+        The number of interpolation points.
+
+    ax : matplotlib.pyplot.Axes, None by default
+        The axis onto which the densities are drawn.  If left as None,
+        matplotlib.pyplot.gca() is called to get the current `Axes`.
+
+
+    Returns
+    -------
+
+    out : matplotlib.collections.LineCollection
+        The collection holding one density curve per group.
+    """
+
+    values, codes, labels = check_groups(x, by)
+    _, _, ax = check_data(None, None, ax)
+
+    x_min, x_max = np.min(values), np.max(values)
+    xs = np.linspace(x_min, x_max, n)
+
+    ys = grouped_gaussian_kde_fft(
+        values, codes, labels.size, x_min, x_max, n, bw_method
+    )
+    segments = np.stack([np.broadcast_to(xs, ys.shape), ys], axis=-1)
+
+    colors = check_colors(colors, labels.size)
+
+    out = LineCollection(
+        segments, colors=colors, linestyles=style, linewidths=size, alpha=alpha, **kws
+    )
+    ax.add_collection(out)
+    ax.autoscale_view()
+    return out
+
+
+def density_stream(
+    x,
+    color="tab:blue",
+    label="",
+    style="-",
+    size=1.5,
+    alpha=1.0,
+    bw_method=None,
+    n=101,
+    range=None,
+    gridsize=4096,
+    chunksize=2 ** 20,
+    ax=None,
+    **kws
+):
+    """Draw density plot of data too large to hold in memory.
+
+    The data are read in chunks and linearly binned onto a grid of about
+    `gridsize` points, which is then smoothed by FFT convolution, so memory
+    is bounded by the grid and chunk sizes rather than by the data.
+
+    Parameters
+    ----------
+    x : {numpy.array, numpy.memmap, string, list, iterator, callable}
+        The data for which the density plot is sought: an array or memmap,
+        the path of a .npy file (memory-mapped), a list of vectors, an
+        iterator of vectors, or a callable returning a new iterator of
+        vectors each time it is called.
+
+    color : string, 'tab:blue' by default
+        The color of the line of the density plot.
+
+    label : string, '' (empty) by default
+        The label within a potential legend.
+
+    style : string, '-' by default
+        The line style of the curve.
+
+    size : float, 1.5 by default
+        The line width of the curve.
+
+    alpha : float, 1.0 by default
+        The transparency of the color.  Values between 0 (transparent) and 1 (opague) are allowed.
+
+    bw_method : string, None by default
+        The bandwidth method used for smoothing, 'scott', 'silverman' or a
+        scalar factor, as for scipy.stats.gaussian_kde.  If None, 'scott'
+        is used.
+
+    n : int, 101 by default
+        The number of interpolation points.
+
+    range : tuple, None by default
+        The (min, max) range of the density; points outside it are ignored.
+        If None, a first pass over the data finds its range, so `x` must
+        not be a plain iterator.
+
+    gridsize : int, 4096 by default
+        The approximate number of points of the binning grid.
+
+    chunksize : int, 2 ** 20 by default
+        The number of values read at a time from an array, memmap or file.
+
+    ax : matplotlib.pyplot.Axes, None by default
+        The axis onto which the box is drawn.  If left as None,
+        matplotlib.pyplot.gca() is called to get the current `Axes`.
+
+
+    Returns
+    -------
+
+    out : matplotlib.pyplot.Axes
+        The `Axes` onto which the box was drawn.
+    """
+
+    chunks, reiterable = check_chunks(x, chunksize)
+    _, _, ax = check_data(None, None, ax)
+
+    if callable(bw_method):
+        raise ValueError("bw_method can not be a callable for streamed data")
+
+    if range is None:
+        if not reiterable:
+            raise ValueError("range must be given when x can only be read once")
+        x_min, x_max = np.inf, -np.inf
+        for chunk in chunks():
+            if chunk.size:
+                x_min, x_max = min(x_min, chunk.min()), max(x_max, chunk.max())
+    else:
+        x_min, x_max = range
+
+    if not x_max > x_min:
+        raise ValueError("the range of x must not be empty")
+
+    density = gaussian_kde_fft_stream(chunks(), x_min, x_max, n, bw_method, gridsize)
+
+    out = curve(
+        np.linspace(x_min, x_max, n),
+        density,
         color=color,
         label=label,
         style=style,
         size=size,
         alpha=alpha,
+        ax=ax,
         **kws
     )
     return out
@@ -1,5 +1,18 @@
-from bplot.check_data import check_data
-from bplot.bayesian_blocks import bayesian_blocks
+from concurrent.futures import ThreadPoolExecutor
+import functools
+import os
+
+from bplot.check_data import check_chunks, check_data
+from bplot.bayesian_blocks import _binned_change_points, bayesian_blocks
+import numpy as np
+
+# bin rules whose widths can be estimated from a sample of the data
+_SAMPLED_RULES = ("auto", "fd", "sturges")
+
+_KWS_ERROR = (
+    "keyword arguments are passed to bayesian_blocks, so bins must be "
+    "'bayesian_blocks' or 'bb'"
+)
 
 
 def histogram(
@@ -10,6 +23,9 @@ def histogram(
     size=1.5,
     alpha=1.0,
     bins="auto",
+    n_jobs=1,
+    sample_size=None,
+    random_state=None,
     ax=None,
     **kws
 ):
@@ -36,34 +52,459 @@ def histogram(
         The transparency of the color.  Values between 0 (transparent) and 1 (opague) are allowed.
 
     bins : {int, string}, 'auto' by default
-        The number of bins.
+        The number of bins.  Either 'bayesian_blocks' or 'bb' chooses
+        the bins with `bplot.bayesian_blocks.bayesian_blocks`.
+
+    n_jobs : int or None, 1 by default
+        The number of threads counting `x`, as for `histogram_count`.
+
+    sample_size : int, None by default
+        If given, the 'auto' and 'fd' bin widths are estimated from a
+        random sample of this size, as for `histogram_count`.
+
+    random_state : {int, numpy.random.RandomState}, None by default
+        The seed, or generator, of the sample of `sample_size`, as for
+        `histogram_count`.
 
     ax : matplotlib.pyplot.Axes, None by default
         The axis onto which the box is drawn.  If left as None,
         matplotlib.pyplot.gca() is called to get the current `Axes`.
 
+    kws : dict
+        Keyword arguments passed to `bayesian_blocks` when bins is
+        'bayesian_blocks', e.g. `fitness`, `method`, `p0`, `grid`,
+        `min_width` or `max_blocks`, but not `return_error`.  As
+        throughout the histogram functions, they are not passed to
+        matplotlib, and are an error with other bins.
+
 
     Returns
     -------
     (n, bins, patches) : 3-tuple
-        `n` is ... TODO (ear) copy output from matplotlib
-        `bins` ...
-        `patches` ...
+        The density of each bin, the bin edges and the drawn patches, as
+        returned by matplotlib.pyplot.hist.
     """
 
     x, _, ax = check_data(x, None, ax)
 
     if bins == "bayesian_blocks" or bins == "bb":
-        bins = bayesian_blocks(x)
+        if "return_error" in kws:
+            raise TypeError(
+                "histogram does not take return_error; call bayesian_blocks "
+                "for the quantization error of grid"
+            )
+        bins = bayesian_blocks(x, **kws)
+    elif kws:
+        raise TypeError(_KWS_ERROR)
+
+    counts, edges = histogram_count(
+        x, bins, n_jobs=n_jobs, sample_size=sample_size, random_state=random_state
+    )
+    return _hist(ax, counts, edges, True, color, label, style, size, alpha)
+
+
+def histogram_count(
+    x,
+    bins="auto",
+    range=None,
+    n_jobs=1,
+    chunksize=2 ** 16,
+    sample_size=None,
+    random_state=None,
+):
+    """Count the values of a vector in the bins of a histogram.
+
+    The vector is split into chunks, which are counted in a pool of
+    threads; NumPy releases the GIL while counting, so the threads run in
+    parallel.  The counts are the same as those of `numpy.histogram`.
+
+    Parameters
+    ----------
+    x : {numpy.array, pandas.core.series.Series}
+        The vector of data.
 
-    n, bins, patches = ax.hist(
-        x,
+    bins : {int, string, numpy.array}, 'auto' by default
+        The number of equal width bins, a rule naming it, or the bin edges,
+        as for `numpy.histogram_bin_edges`.
+
+    range : tuple, None by default
+        The (min, max) range of the bins.  If None, the range of `x`.
+
+    n_jobs : int or None, 1 by default
+        The number of threads.  None uses one per CPU.
+
+    chunksize : int, 2 ** 16 by default
+        The number of values counted at a time by each thread.  Chunks
+        small enough to stay in cache are counted fastest.
+
+    sample_size : int, None by default
+        If given, and `bins` is 'auto' or 'fd', the interquartile range in
+        the Freedman-Diaconis bin width is estimated from a random sample
+        of this many values, rather than by partitioning all of `x`.  The
+        range of the bins is still that of all of `x`.  By the
+        Dvoretzky-Kiefer-Wolfowitz inequality, with probability 1 - a the
+        sample quartiles are the quantiles of `x` at levels within
+        e = sqrt(log(2 / a) / (2 * sample_size)) of 0.25 and 0.75; for
+        a sample of 2 ** 16 and a = 0.05, e < 0.006.  The sample is drawn
+        with replacement, so the bins are random.
+
+    random_state : {int, numpy.random.RandomState}, None by default
+        The seed, or generator, of the sample of `sample_size`.  If None,
+        a freshly seeded generator is used, and the same data may get
+        different bins from call to call; give a seed to fix them.
+
+    Returns
+    -------
+    (counts, edges) : 2-tuple
+        The count of each bin and the bin edges.
+
+    Examples
+    --------
+    >>> counts, edges = histogram_count(x, bins=100, n_jobs=4)
+    >>> histogram_binned(counts, edges)
+    """
+
+    x = np.asarray(x)
+    sampled = isinstance(bins, str) and bins in ("auto", "fd")
+    if sampled and sample_size is not None and x.size > sample_size:
+        lo, hi = (x.min(), x.max()) if range is None else range
+        if not (np.isfinite(lo) and np.isfinite(hi)):
+            raise ValueError("the range of x must be finite")
+        rng = _random_state(random_state)
+        sample = x[rng.randint(0, x.size, sample_size)]
+        inside = (sample >= lo) & (sample <= hi)
+        n = x.size * np.mean(inside)
+        edges = _sample_bin_edges(sample[inside], n, lo, hi, bins)
+    else:
+        edges = np.histogram_bin_edges(x, bins, range)
+    count = functools.partial(_count, edges=edges, uniform=np.ndim(bins) == 0)
+    chunks = (x[i : i + chunksize] for i in np.arange(0, x.size, chunksize))
+
+    if n_jobs is None:
+        n_jobs = os.cpu_count() or 1
+    counts = np.zeros(edges.size - 1, dtype=np.intp)
+    if n_jobs <= 1 or x.size <= chunksize:
+        for c in map(count, chunks):
+            counts += c
+    else:
+        with ThreadPoolExecutor(max_workers=n_jobs) as executor:
+            for c in executor.map(count, chunks):
+                counts += c
+
+    return counts, edges
+
+
+def histogram_stream(
+    x,
+    color="tab:blue",
+    label="",
+    style="-",
+    size=1.5,
+    alpha=1.0,
+    bins=50,
+    range=None,
+    chunksize=2 ** 20,
+    sample_size=2 ** 16,
+    random_state=None,
+    ax=None,
+):
+    """Draw a histogram of data too large to hold in memory.
+
+    The data are read in chunks and counted into fixed bins, so memory is
+    bounded by the number of bins and the chunk size rather than by the
+    data.  Bayesian blocks, which need all of the data, are not offered;
+    count the data with a fine `bins` here or with `histogram_count`, and
+    merge the bins into blocks with `histogram_binned`.  So, unlike the
+    other histogram functions, it takes no keyword arguments for
+    `bayesian_blocks`.
+
+    Parameters
+    ----------
+    x : {numpy.array, numpy.memmap, string, list, iterator, callable}
+        The data from which the histogram is drawn: an array or memmap,
+        the path of a .npy file (memory-mapped), a list of vectors, an
+        iterator of vectors, or a callable returning a new iterator of
+        vectors each time it is called.
+
+    color : string, 'tab:blue' by default
+        The color of the outline of the histogram.
+
+    label : string, '' (empty) by default
+        The label within a potential legend.
+
+    style : string, '-' by default
+        The line style of the curve.
+
+    size : float, 1.5 by default
+        The line width of the curve.
+
+    alpha : float, 1.0 by default
+        The transparency of the color.  Values between 0 (transparent) and 1 (opague) are allowed.
+
+    bins : {int, string, numpy.array}, 50 by default
+        The number of equal width bins spanning `range`, the rule 'auto',
+        'fd' or 'sturges' naming it, or the bin edges.  Values outside the
+        edges are not counted.
+
+    range : tuple, None by default
+        The (min, max) range of the equal width bins.  If None, a first pass
+        over the data finds its range, so `x` must not be a plain iterator.
+
+    chunksize : int, 2 ** 20 by default
+        The number of values read at a time from an array, memmap or file.
+
+    sample_size : int, 2 ** 16 by default
+        The size of the random sample, drawn in the first pass, from which
+        a bin rule estimates the interquartile range, as for
+        `histogram_count`.  The bins of a rule are therefore random.
+
+    random_state : {int, numpy.random.RandomState}, None by default
+        The seed, or generator, of the sample.  If None, a freshly seeded
+        generator is used; give a seed to fix the bins of a rule.
+
+    ax : matplotlib.pyplot.Axes, None by default
+        The axis onto which the box is drawn.  If left as None,
+        matplotlib.pyplot.gca() is called to get the current `Axes`.
+
+
+    Returns
+    -------
+    (n, bins, patches) : 3-tuple
+        The density of each bin, the bin edges and the drawn patches, as
+        returned by matplotlib.pyplot.hist.
+    """
+
+    chunks, reiterable = check_chunks(x, chunksize)
+    _, _, ax = check_data(None, None, ax)
+
+    if isinstance(bins, str) and bins not in _SAMPLED_RULES:
+        raise ValueError("bins must be 'auto', 'fd' or 'sturges' when a string")
+
+    if np.ndim(bins) == 0:
+        lo, hi, n, sample = np.inf, -np.inf, 0, None
+        rng = _random_state(random_state)
+        if range is None or isinstance(bins, str):
+            if not reiterable:
+                raise ValueError("range must be given when x can only be read once")
+            for chunk in chunks():
+                if range is not None:
+                    chunk = chunk[(chunk >= range[0]) & (chunk <= range[1])]
+                if chunk.size:
+                    lo, hi = min(lo, chunk.min()), max(hi, chunk.max())
+                    n += chunk.size
+                    if isinstance(bins, str):
+                        sample = _reservoir(sample, chunk, sample_size, rng)
+        if range is not None:
+            lo, hi = range
+        if not hi >= lo:
+            raise ValueError("x must not be empty")
+        if isinstance(bins, str):
+            edges = _sample_bin_edges(
+                None if sample is None else sample[0], n, lo, hi, bins
+            )
+        else:
+            if lo == hi:
+                lo, hi = lo - 0.5, hi + 0.5
+            edges = np.linspace(lo, hi, int(bins) + 1)
+    else:
+        edges = np.asarray(bins, dtype=float)
+
+    counts = np.zeros(edges.size - 1)
+    for chunk in chunks():
+        counts += _count(chunk, edges, uniform=np.ndim(bins) == 0)
+
+    return _hist(ax, counts, edges, True, color, label, style, size, alpha)
+
+
+def histogram_binned(
+    counts,
+    edges,
+    color="tab:blue",
+    label="",
+    style="-",
+    size=1.5,
+    alpha=1.0,
+    density=True,
+    bins=None,
+    ax=None,
+    **kws
+):
+    """Draw a histogram from counts already binned.
+
+    The counts are drawn as they are, without expanding them back into
+    samples.
+
+    Parameters
+    ----------
+    counts : numpy.array
+        The count, or weight, of each bin.
+
+    edges : numpy.array
+        The bin edges, one more than the number of counts.
+
+    color : string, 'tab:blue' by default
+        The color of the outline of the histogram.
+
+    label : string, '' (empty) by default
+        The label within a potential legend.
+
+    style : string, '-' by default
+        The line style of the curve.
+
+    size : float, 1.5 by default
+        The line width of the curve.
+
+    alpha : float, 1.0 by default
+        The transparency of the color.  Values between 0 (transparent) and 1 (opague) are allowed.
+
+    density : bool, True by default
+        Whether to draw the density, rather than the counts, of each bin.
+
+    bins : string, None by default
+        If 'bayesian_blocks' or 'bb', the bins are merged into Bayesian
+        blocks found by `bplot.bayesian_blocks.bayesian_blocks` from the
+        counts and the widths of the bins.  The blocks' edges are a subset
+        of `edges`.  With the default fitness, 'events', the counts must
+        be whole numbers, not weights.
+
+    ax : matplotlib.pyplot.Axes, None by default
+        The axis onto which the box is drawn.  If left as None,
+        matplotlib.pyplot.gca() is called to get the current `Axes`.
+
+    kws : dict
+        Keyword arguments passed to `bayesian_blocks` when bins is
+        'bayesian_blocks', e.g. `fitness`, `method` or `p0`.  As throughout
+        the histogram functions, they are not passed to matplotlib, and are
+        an error with other bins.
+
+
+    Returns
+    -------
+    (n, bins, patches) : 3-tuple
+        The density, or count, of each bin, the bin edges and the drawn
+        patches, as returned by matplotlib.pyplot.hist.
+    """
+
+    counts = np.asarray(counts, dtype=float)
+    edges = np.asarray(edges, dtype=float)
+    _, _, ax = check_data(None, None, ax)
+
+    if counts.ndim != 1 or edges.shape != (counts.size + 1,):
+        raise ValueError("edges must be one longer than counts")
+
+    if bins == "bayesian_blocks" or bins == "bb":
+        if kws.get("fitness", "events") == "events" and (
+            np.any(counts % 1 > 0) or np.any(counts < 0)
+        ):
+            raise ValueError(
+                "counts must be whole numbers with bins='bayesian_blocks', "
+                "not weights"
+            )
+        counts, edges = _rebin_bayesian_blocks(counts, edges, **kws)
+    elif bins is not None:
+        raise ValueError("bins must be None, 'bayesian_blocks' or 'bb'")
+    elif kws:
+        raise TypeError(_KWS_ERROR)
+
+    return _hist(ax, counts, edges, density, color, label, style, size, alpha)
+
+
+def _rebin_bayesian_blocks(counts, edges, **kws):
+    """Merge binned counts into Bayesian blocks.
+
+    The blocks are found from the bins themselves, each spanning its own
+    edges, so that the counts are summed exactly over whole bins.  Empty
+    bins before the first count and after the last are left out.
+    """
+    filled = np.flatnonzero(counts)
+    if filled.size == 0:
+        raise ValueError("counts must not all be zero")
+
+    lo, hi = filled[0], filled[-1] + 1
+    i = lo + _binned_change_points(counts[lo:hi], edges[lo : hi + 1], **kws)
+
+    return np.add.reduceat(counts, i[:-1]), edges[i]
+
+
+def _hist(ax, counts, edges, density, color, label, style, size, alpha):
+    """Draw binned counts as a step histogram with matplotlib."""
+    return ax.hist(
+        edges[:-1],
+        weights=counts,
         color=color,
         label=label,
         linestyle=style,
         linewidth=size,
         alpha=alpha,
-        density=True,
+        density=density,
         histtype="step",
-        bins=bins,
+        bins=edges,
     )
+
+
+def _random_state(random_state):
+    """The RandomState of a seed; a freshly seeded one for None."""
+    if isinstance(random_state, np.random.RandomState):
+        return random_state
+    return np.random.RandomState(random_state)
+
+
+def _sample_bin_edges(sample, n, lo, hi, rule):
+    """Equal width bin edges from lo to hi, chosen by a bin rule of
+    numpy.histogram_bin_edges for n values, with the interquartile range
+    of the values estimated from a sample of them."""
+    if lo == hi:
+        lo, hi = lo - 0.5, hi + 0.5
+        ptp = 0
+    else:
+        ptp = hi - lo
+
+    sturges = ptp / (np.log2(n) + 1)
+    if rule == "sturges":
+        width = sturges
+    else:
+        q25, q75 = np.percentile(sample, [25, 75])
+        fd = 2 * (q75 - q25) * n ** (-1 / 3)
+        if rule == "fd":
+            width = fd
+        else:
+            width = min(fd, sturges) if fd else sturges
+
+    n_bins = int(np.ceil((hi - lo) / width)) if width else 1
+    return np.linspace(lo, hi, n_bins + 1)
+
+
+def _reservoir(sample, x, size, rng):
+    """Merge x into a uniform random sample, without replacement, of at
+    most size values: each value draws a random key from rng and the
+    values with the smallest keys are kept.  The sample is a pair (values,
+    keys)."""
+    keys = rng.random_sample(x.size)
+    if sample is not None:
+        x = np.concatenate([sample[0], x])
+        keys = np.concatenate([sample[1], keys])
+    if x.size > size:
+        keep = np.argpartition(keys, size)[:size]
+        x, keys = x[keep], keys[keep]
+    return x, keys
+
+
+def _count(x, edges, uniform=False):
+    """Count the values of x in each bin, as numpy.histogram does: each
+    bin is half open except the last, and values outside are ignored."""
+    n_bins = edges.size - 1
+    inside = (x >= edges[0]) & (x <= edges[-1])
+    if not inside.all():
+        x = x[inside]
+
+    if uniform:
+        i = ((x - edges[0]) * (n_bins / (edges[-1] - edges[0]))).astype(np.intp)
+        # rounding can put values one bin off; fix them up against the edges
+        i -= x < edges[i]
+        i += (x >= edges[np.minimum(i + 1, n_bins)]) & (i < n_bins - 1)
+        i = np.minimum(i, n_bins - 1)
+    else:
+        i = np.searchsorted(edges, x, side="right") - 1
+        i[x == edges[-1]] = n_bins - 1
+
+    return np.bincount(i, minlength=n_bins)
@@ -0,0 +1,295 @@
+"""Binned Gaussian kernel density estimates.
+
+The data are linearly binned onto a fine regular grid and the bin
+weights are convolved with a sampled Gaussian kernel by FFT, so that a
+density on n points costs O(len(x) + m log m) for a grid of m points,
+rather than the O(len(x) * n) of `scipy.stats.gaussian_kde`.  See
+Wand, M. P. (1994) Fast Computation of Multivariate Kernel Estimators,
+Journal of Computational and Graphical Statistics 3(4).
+"""
+
+from bplot.summary import Moments
+import numpy as np
+from scipy import stats
+from scipy.fft import next_fast_len
+
+# grid points per kernel standard deviation, the largest grid used, and
+# the largest number of grid points across all groups
+_POINTS_PER_BANDWIDTH = 8
+_MAX_GRID = 2 ** 16
+_MAX_CELLS = 2 ** 20
+
+# kernels are truncated this many standard deviations from their center
+_TRUNCATE = 5
+
+
+def bandwidth(x, bw_method=None):
+    """Kernel standard deviation chosen as by `scipy.stats.gaussian_kde`.
+
+    Parameters
+    ----------
+    x : numpy.array
+        The vector of data.
+
+    bw_method : {string, scalar, callable}, None by default
+        'scott' (the default), 'silverman', a scalar factor, or a callable
+        taking a `gaussian_kde` and returning a factor.
+
+    Returns
+    -------
+    h : float
+        The kernel standard deviation, in the units of `x`.
+    """
+
+    if callable(bw_method):
+        # building the kde is cheap, only evaluating it is not
+        kde = stats.gaussian_kde(x, bw_method)
+        return np.sqrt(kde.covariance[0, 0])
+
+    return _bandwidth(x.size, np.std(x, ddof=1), bw_method)
+
+
+def _bandwidth(n, std, bw_method):
+    """Kernel standard deviation from the sample size and deviation."""
+    if bw_method is None or bw_method == "scott":
+        factor = n ** (-1 / 5)
+    elif bw_method == "silverman":
+        factor = (n * 3 / 4) ** (-1 / 5)
+    elif np.isscalar(bw_method) and not isinstance(bw_method, str):
+        factor = bw_method
+    else:
+        raise ValueError(
+            "bw_method must be 'scott', 'silverman', a scalar or a callable"
+        )
+    return factor * std
+
+
+def group_bandwidths(x, codes, n_groups, bw_method=None):
+    """Kernel standard deviation of each group of x, as by `bandwidth`.
+
+    Parameters
+    ----------
+    x : numpy.array
+        The vector of data.
+
+    codes : numpy.array
+        The group index, from 0 to `n_groups` - 1, of each value of `x`.
+
+    n_groups : int
+        The number of groups.
+
+    bw_method : {string, scalar, callable}, None by default
+        The bandwidth method, as for `scipy.stats.gaussian_kde`.
+
+    Returns
+    -------
+    h : numpy.array
+        The kernel standard deviation of each group.
+    """
+
+    if callable(bw_method):
+        return np.array([bandwidth(x[codes == g], bw_method) for g in range(n_groups)])
+
+    n = np.bincount(codes, minlength=n_groups)
+    mean = np.bincount(codes, x, minlength=n_groups) / np.maximum(n, 1)
+    ss = np.bincount(codes, (x - mean[codes]) ** 2, minlength=n_groups)
+    std = np.sqrt(ss / np.maximum(n - 1, 1))
+    return _bandwidth(np.maximum(n, 1), std, bw_method)
+
+
+def gaussian_kde_fft(x, x_min, x_max, n, bw_method=None):
+    """Evaluate a binned Gaussian kernel density estimate.
+
+    Parameters
+    ----------
+    x : numpy.array
+        The vector of data.  Points outside [x_min, x_max] are ignored.
+
+    x_min, x_max : float
+        The range of the evaluation grid.
+
+    n : int
+        The number of evaluation points, as for `numpy.linspace`.
+
+    bw_method : {string, scalar, callable}, None by default
+        The bandwidth method, as for `scipy.stats.gaussian_kde`.
+
+    Returns
+    -------
+    density : numpy.array
+        The density at `numpy.linspace(x_min, x_max, n)`.
+    """
+
+    if not x_max > x_min:
+        raise ValueError("x_max must be greater than x_min")
+
+    h = bandwidth(x, bw_method)
+    k, m = _refinement(x_max - x_min, n, h)
+    weights = _linear_binning(x, x_min, x_max, m)
+    return _smooth(weights, (x_max - x_min) / (m - 1), h)[0, ::k]
+
+
+def grouped_gaussian_kde_fft(x, codes, n_groups, x_min, x_max, n, bw_method=None):
+    """Evaluate binned Gaussian kernel density estimates of many groups.
+
+    All groups are binned in one pass and smoothed with one batch of FFTs.
+
+    Parameters
+    ----------
+    x : numpy.array
+        The vector of data.  Points outside their group's range are ignored.
+
+    codes : numpy.array
+        The group index, from 0 to `n_groups` - 1, of each value of `x`.
+
+    n_groups : int
+        The number of groups.
+
+    x_min, x_max : {float, numpy.array}
+        The range of the evaluation grid, shared or of each group.
+
+    n : int
+        The number of evaluation points of each group.
+
+    bw_method : {string, scalar, callable}, None by default
+        The bandwidth method, as for `scipy.stats.gaussian_kde`.
+
+    Returns
+    -------
+    density : numpy.array
+        The (n_groups, n) densities of each group at
+        `numpy.linspace(x_min, x_max, n)`.
+    """
+
+    x_min = np.broadcast_to(np.asarray(x_min, dtype=float), (n_groups,))
+    x_max = np.broadcast_to(np.asarray(x_max, dtype=float), (n_groups,))
+    if np.any(x_max <= x_min):
+        raise ValueError("x_max must be greater than x_min")
+
+    h = group_bandwidths(x, codes, n_groups, bw_method)
+    max_grid = min(_MAX_GRID, _MAX_CELLS // n_groups)
+    k, m = _refinement(1.0, n, np.min(h / (x_max - x_min)), max_grid)
+    weights = _linear_binning(x, x_min, x_max, m, codes, n_groups)
+    return _smooth(weights, (x_max - x_min) / (m - 1), h)[:, ::k]
+
+
+def gaussian_kde_fft_stream(chunks, x_min, x_max, n, bw_method=None, gridsize=4096):
+    """Evaluate a binned Gaussian kernel density estimate of chunked data.
+
+    Each chunk is binned as it arrives, so memory is bounded by the grid.
+
+    Parameters
+    ----------
+    chunks : iterable
+        The vectors of data.  Points outside [x_min, x_max] are ignored.
+
+    x_min, x_max : float
+        The range of the evaluation grid.
+
+    n : int
+        The number of evaluation points, as for `numpy.linspace`.
+
+    bw_method : {string, scalar}, None by default
+        The bandwidth method, as for `scipy.stats.gaussian_kde`.
+
+    gridsize : int, 4096 by default
+        The approximate number of points of the binning grid.
+
+    Returns
+    -------
+    density : numpy.array
+        The density at `numpy.linspace(x_min, x_max, n)`.
+    """
+
+    if not x_max > x_min:
+        raise ValueError("x_max must be greater than x_min")
+
+    k = max(1, (gridsize - 1) // (n - 1))
+    m = (n - 1) * k + 1
+    weights = np.zeros((1, m))
+
+    moments = Moments()
+    for chunk in chunks:
+        chunk = chunk[(chunk >= x_min) & (chunk <= x_max)]
+        if chunk.size == 0:
+            continue
+        weights += _linear_binning(chunk, x_min, x_max, m)
+        moments.update(chunk)
+
+    count = moments.count
+    h = _bandwidth(count, np.sqrt(moments.m2 / max(count - 1, 1)), bw_method)
+    return _smooth(weights, (x_max - x_min) / (m - 1), h)[0, ::k]
+
+
+def _refinement(width, n, h, max_grid=_MAX_GRID):
+    """Refine a grid of n points by k, to m = (n - 1) * k + 1 points,
+    so that each kernel standard deviation h spans several points."""
+    k = 1
+    if width > 0 and n > 1:
+        with np.errstate(divide="ignore"):
+            k = _POINTS_PER_BANDWIDTH * width / (n - 1) / np.min(h)
+        k = int(np.clip(np.ceil(k), 1, max(1, (max_grid - 1) // (n - 1))))
+    return k, (n - 1) * k + 1
+
+
+def _linear_binning(x, lo, hi, m, codes=None, n_groups=1):
+    """Split each point of x between its two neighbors on the regular
+    grid of m points from lo to hi, in proportion to its closeness.
+
+    With codes, the points are binned into the row of their group, and
+    lo and hi may give the range of each group.
+    """
+    if codes is None:
+        codes = np.zeros(x.shape, dtype=int)
+    lo = np.broadcast_to(lo, (n_groups,))[codes]
+    hi = np.broadcast_to(hi, (n_groups,))[codes]
+
+    inside = (x >= lo) & (x <= hi)
+    x, lo, hi, codes = x[inside], lo[inside], hi[inside], codes[inside]
+
+    position = (x - lo) / (hi - lo) * (m - 1)
+    i = np.minimum(position.astype(int), m - 2) + codes * m
+    w = position - (i - codes * m)
+
+    weights = np.bincount(i, 1 - w, minlength=n_groups * m)
+    weights += np.bincount(i + 1, w, minlength=n_groups * m)
+    return weights.reshape(n_groups, m)
+
+
+def _smooth(weights, delta, h):
+    """Convolve each row of grid weights with a Gaussian kernel.
+
+    Row r has grid spacing delta[r] and is smoothed with standard deviation
+    h[r].  Each row is normalized to a density by its total weight.
+    """
+    weights = np.atleast_2d(weights)
+    h = np.broadcast_to(np.asarray(h, dtype=float), weights.shape[:1])
+    delta = np.broadcast_to(np.asarray(delta, dtype=float), weights.shape[:1])
+    m = weights.shape[1]
+
+    # kernel half width in grid points, and an FFT length long enough
+    # that the circular convolution does not wrap onto the grid
+    scale = np.maximum(h / delta, 1e-12)
+    L = int(min(m - 1, np.ceil(_TRUNCATE * np.max(scale))))
+    size = next_fast_len(m + L, real=True)
+
+    offsets = np.zeros(size)
+    offsets[: L + 1] = np.arange(L + 1)
+    offsets[size - L :] = np.arange(-L, 0)
+    kernels = np.exp(-0.5 * (offsets / scale[:, None]) ** 2)
+    kernels[:, L + 1 : size - L] = 0
+
+    # the full kernel mass, even where the grid cuts the kernel off; only
+    # kernels narrower than the grid spacing need the discrete sum
+    mass = np.sqrt(2 * np.pi) * scale
+    narrow = scale < 1
+    mass[narrow] = kernels[narrow].sum(axis=1)
+    kernels /= (mass * delta)[:, None]
+
+    density = np.fft.irfft(
+        np.fft.rfft(weights, size) * np.fft.rfft(kernels, size), size
+    )[:, :m]
+
+    total = weights.sum(axis=1, keepdims=True)
+    total[total == 0] = 1
+    return np.maximum(density, 0) / total
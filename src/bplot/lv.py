@@ -3,12 +3,17 @@
 # https://github.com/mwaskom/seaborn/blob/master/seaborn/categorical.py
 # under BSD-3 license
 
-from bplot.check_data import check_data
-
-import matplotlib as mpl
-import matplotlib.pyplot as plt
-import matplotlib.patches as Patches
-from matplotlib.collections import PatchCollection
+from bplot.check_data import (
+    check_colors,
+    check_data,
+    check_groups,
+    check_positions,
+    oriented,
+)
+from bplot.summary import QuantileSketch, grouped_quantiles
+
+from matplotlib.collections import LineCollection, PolyCollection
+from matplotlib.colors import to_rgba_array
 import numpy as np
 from scipy import stats
 
@@ -31,8 +36,10 @@ def lv(
     x : int
         The location along the x-axis at which the vertical letter value plot is placed.
 
-    y : {numpy.array, pandas.core.series.Series}
-        The vector of data for which the percentiles are sought.
+    y : {numpy.array, pandas.core.series.Series, bplot.QuantileSketch}
+        The vector of data for which the percentiles are sought, or a
+        sketch of it.  Of a sketch, only the smallest and largest values
+        can be drawn as outliers.
 
     color : string, 'tab:blue' by default
         The color of the boxes.
@@ -43,10 +50,14 @@ def lv(
     widths : float, 0.8 by default
         The width of the median box.
 
+    p : float, 0.007 by default
+        The proportion of outliers sought, which sets the depth for
+        `k_depth` 'proportion' and 'trustworthy'.
+
     scale : string, 'linear' by default
         Options are exponential, linear, or area.
 
-    k_depth : string, 'proportion' by default
+    k_depth : string, 'trustworthy' by default
         Options are proportion, tukey, or trustworthy.
 
     ax : matplotlib.pyplot.Axes, None by default
@@ -61,96 +72,351 @@ def lv(
         The `Axes` onto which the box was drawn.
     """
 
-    _, y, ax = check_data(None, y, ax)
-    if ax is None:
-        ax = plt.gca()
+    return _lv(
+        [x],
+        y if isinstance(y, QuantileSketch) else [y],
+        None,
+        colors=[color],
+        label=label,
+        widths=widths,
+        p=p,
+        scale=scale,
+        k_depth=k_depth,
+        vert=True,
+        ax=ax,
+    )
+
+
+def lv_h(
+    x,
+    y,
+    color="tab:blue",
+    label="",
+    widths=0.8,
+    p=0.007,
+    scale="linear",
+    k_depth="trustworthy",
+    ax=None,
+):
+    """Draw horizontal letter value plot.
 
-    n = y.size
-    k_dict = {
-        "proportion": (np.log2(n)) - int(np.log2(n * p)) + 1,
-        "tukey": (np.log2(n)) - 3,
-        "trustworthy": (np.log2(n) - np.log2(2 * stats.norm.ppf((1 - p)) ** 2)) + 1,
-    }
-    k = k_dict[k_depth]
-    try:
-        k = int(k)
-    except ValueError:
-        k = 1
-    # If the number happens to be less than 0, set k to 0
-    if k < 1.0:
-        k = 1
-
-    upper = [100 * (1 - 0.5 ** (i + 2)) for i in range(k, -1, -1)]
-    lower = [100 * (0.5 ** (i + 2)) for i in range(k, -1, -1)]
-    # Stitch the box ends together
-    percentile_ends = [(i, j) for i, j in zip(lower, upper)]
-    box_ends = [np.percentile(y, q) for q in percentile_ends]
-
-    # Dictionary of functions for computing the width of the boxes
-    width_functions = {
-        "linear": lambda h, i, k: (i - 1.0) / k,
-        "exponential": lambda h, i, k: 2 ** (-k + i - 1),
-        "area": lambda h, i, k: (1 - 2 ** (-k + i - 2)) / h,
-    }
+    Parameters
+    ----------
+    x : {numpy.array, pandas.core.series.Series, bplot.QuantileSketch}
+        The vector of data for which the percentiles are sought, or a
+        sketch of it.  Of a sketch, only the smallest and largest values
+        can be drawn as outliers.
 
-    # Anonymous functions for calculating the width and height
-    # of the letter value boxes
-    width = width_functions[scale]
-
-    # Function to find height of boxes
-    def height(b):
-        return b[1] - b[0]
-
-    # Functions to construct the letter value boxes
-    def vert_perc_box(x, b, i, k, w):
-        rect = Patches.FancyBboxPatch(
-            (x - widths * w / 2, b[0]),
-            widths * w,
-            height(b),
-            fill=True,
-            boxstyle="round,pad=0.05",
-        )
-        return rect
-
-    def horz_perc_box(x, b, i, k, w):
-        rect = Patches.Rectangle(
-            (b[0], x - widths * w / 2), height(b), widths * w, fill=True
-        )
-        return rect
-
-    # Scale the width of the boxes so the biggest starts at 1
-    w_area = np.array([width(height(b), i, k) for i, b in enumerate(box_ends)])
-    w_area /= np.max(w_area)
-
-    # Calculate the median
-    median_y = np.median(y)
-
-    # Calculate the outliers and plot
-    perc_ends = (100 * (0.5 ** (k + 2)), 100 * (1 - 0.5 ** (k + 2)))
-    edges = np.percentile(y, perc_ends)
-    lower_out = y[np.where(y < edges[0])[0]]
-    upper_out = y[np.where(y > edges[1])[0]]
-    outliers = np.concatenate((lower_out, upper_out))
-
-    boxes = [
-        vert_perc_box(x, b[0], i, k, b[1]) for i, b in enumerate(zip(box_ends, w_area))
-    ]
-
-    # Plot the medians
-    half_width = boxes[k].get_extents().width / 2
-    ax.plot([x - half_width, x + half_width], [median_y, median_y], c=".15", alpha=0.45)
-
-    # Plot the outliers
-    color = mpl.colors.to_hex(color)
-    ax.scatter(np.repeat(x, len(outliers)), outliers, marker="*", c=color)
-
-    rgb = [[1, 1, 1], mpl.colors.to_rgb(color)]
-    cmap = mpl.colors.LinearSegmentedColormap.from_list("new_map", rgb)
-    collection = PatchCollection(boxes[1:], cmap=cmap, edgecolors=([0, 0, 0, 0.45],))
-    collection.set_array(np.array(np.linspace(0, 1, len(boxes))))
-    ax.add_collection(collection)
+    y : int
+        The location along the y-axis at which the horizontal letter value plot is placed.
 
-    return ax
+    color : string, 'tab:blue' by default
+        The color of the boxes.
 
+    label : string, '' (empty) by default
+        The label within a potential legend.
+
+    widths : float, 0.8 by default
+        The height of the median box.
 
-# TODO lv_h: minimize duplicate code
+    p : float, 0.007 by default
+        The proportion of outliers sought, which sets the depth for
+        `k_depth` 'proportion' and 'trustworthy'.
+
+    scale : string, 'linear' by default
+        Options are exponential, linear, or area.
+
+    k_depth : string, 'trustworthy' by default
+        Options are proportion, tukey, or trustworthy.
+
+    ax : matplotlib.pyplot.Axes, None by default
+        The axis onto which the letter value plot is drawn.  If left as None,
+        matplotlib.pyplot.gca() is called to get the current `Axes`.
+
+
+    Returns
+    -------
+
+    out : matplotlib.pyplot.Axes
+        The `Axes` onto which the box was drawn.
+    """
+
+    return _lv(
+        [y],
+        x if isinstance(x, QuantileSketch) else [x],
+        None,
+        colors=[color],
+        label=label,
+        widths=widths,
+        p=p,
+        scale=scale,
+        k_depth=k_depth,
+        vert=False,
+        ax=ax,
+    )
+
+
+def lvs(
+    x,
+    y,
+    by=None,
+    colors=None,
+    label="",
+    widths=0.8,
+    p=0.007,
+    scale="linear",
+    k_depth="trustworthy",
+    ax=None,
+):
+    """Draw vertical letter value plots of many groups.
+
+    All letter values are computed with one sort, and all boxes are drawn
+    as a single `PolyCollection`.
+
+    Parameters
+    ----------
+    x : {numpy.array, list, None}
+        The locations along the x-axis at which the letter value plots are
+        placed, one per group.  It may be None, which places the groups at
+        1, 2, ....
+
+    y : {list, numpy.array, pandas.core.frame.DataFrame, pandas.core.series.Series}
+        The groups of data for which the percentiles are sought: a list of
+        vectors, a 2D array or a DataFrame whose columns are the groups, or
+        a vector of data grouped by `by`.
+
+    by : {numpy.array, pandas.core.series.Series, string}, None by default
+        The group label of each value of `y`, or the name of the column of
+        group labels when `y` is a DataFrame with one other column.
+
+    colors : list, None by default
+        The color of each group's boxes, in order of the sorted group
+        labels.  If None, `bplot.colors.color` is cycled through.
+
+    label : string, '' (empty) by default
+        The label within a potential legend.
+
+    widths : float, 0.8 by default
+        The width of the median boxes.
+
+    p : float, 0.007 by default
+        The proportion of outliers sought, which sets the depth for
+        `k_depth` 'proportion' and 'trustworthy'.
+
+    scale : string, 'linear' by default
+        Options are exponential, linear, or area.
+
+    k_depth : string, 'trustworthy' by default
+        Options are proportion, tukey, or trustworthy.
+
+    ax : matplotlib.pyplot.Axes, None by default
+        The axis onto which the letter value plots are drawn.  If left as None,
+        matplotlib.pyplot.gca() is called to get the current `Axes`.
+
+
+    Returns
+    -------
+
+    out : matplotlib.pyplot.Axes
+        The `Axes` onto which the boxes were drawn.
+    """
+
+    return _lv(
+        x,
+        y,
+        by,
+        colors=colors,
+        label=label,
+        widths=widths,
+        p=p,
+        scale=scale,
+        k_depth=k_depth,
+        vert=True,
+        ax=ax,
+    )
+
+
+def lvs_h(
+    x,
+    y,
+    by=None,
+    colors=None,
+    label="",
+    widths=0.8,
+    p=0.007,
+    scale="linear",
+    k_depth="trustworthy",
+    ax=None,
+):
+    """Draw horizontal letter value plots of many groups.
+
+    All letter values are computed with one sort, and all boxes are drawn
+    as a single `PolyCollection`.
+
+    Parameters
+    ----------
+    x : {list, numpy.array, pandas.core.frame.DataFrame, pandas.core.series.Series}
+        The groups of data for which the percentiles are sought: a list of
+        vectors, a 2D array or a DataFrame whose columns are the groups, or
+        a vector of data grouped by `by`.
+
+    y : {numpy.array, list, None}
+        The locations along the y-axis at which the letter value plots are
+        placed, one per group.  It may be None, which places the groups at
+        1, 2, ....
+
+    by : {numpy.array, pandas.core.series.Series, string}, None by default
+        The group label of each value of `x`, or the name of the column of
+        group labels when `x` is a DataFrame with one other column.
+
+    colors : list, None by default
+        The color of each group's boxes, in order of the sorted group
+        labels.  If None, `bplot.colors.color` is cycled through.
+
+    label : string, '' (empty) by default
+        The label within a potential legend.
+
+    widths : float, 0.8 by default
+        The height of the median boxes.
+
+    p : float, 0.007 by default
+        The proportion of outliers sought, which sets the depth for
+        `k_depth` 'proportion' and 'trustworthy'.
+
+    scale : string, 'linear' by default
+        Options are exponential, linear, or area.
+
+    k_depth : string, 'trustworthy' by default
+        Options are proportion, tukey, or trustworthy.
+
+    ax : matplotlib.pyplot.Axes, None by default
+        The axis onto which the letter value plots are drawn.  If left as None,
+        matplotlib.pyplot.gca() is called to get the current `Axes`.
+
+
+    Returns
+    -------
+
+    out : matplotlib.pyplot.Axes
+        The `Axes` onto which the boxes were drawn.
+    """
+
+    return _lv(
+        y,
+        x,
+        by,
+        colors=colors,
+        label=label,
+        widths=widths,
+        p=p,
+        scale=scale,
+        k_depth=k_depth,
+        vert=False,
+        ax=ax,
+    )
+
+
+def _lv(positions, data, by, colors, label, widths, p, scale, k_depth, vert, ax):
+    """Draw letter value plots of grouped data, along the y-axis if vert."""
+
+    _, _, ax = check_data(None, None, ax)
+
+    if isinstance(data, QuantileSketch):
+        n_groups = 1
+        n = np.array([data.count])
+        values, codes = np.array([data.min, data.max]), np.zeros(2, dtype=int)
+
+        def quantiles(qs):
+            return data.quantile(qs)[None, :]
+
+    else:
+        values, codes, labels = check_groups(data, by)
+        n_groups = labels.size
+        n = np.bincount(codes, minlength=n_groups)
+
+        def quantiles(qs):
+            return grouped_quantiles(values, codes, n_groups, qs)
+
+    positions = check_positions(positions, n_groups)
+
+    colors = check_colors(colors, n_groups)
+    colors = to_rgba_array(colors)
+
+    # the number of letter values of each group
+    with np.errstate(divide="ignore", invalid="ignore"):
+        k_dict = {
+            "proportion": np.log2(n) - np.trunc(np.log2(n * p)) + 1,
+            "tukey": np.log2(n) - 3,
+            "trustworthy": np.log2(n) - np.log2(2 * stats.norm.ppf(1 - p) ** 2) + 1,
+        }
+    if k_depth not in k_dict:
+        raise ValueError("k_depth must be 'proportion', 'tukey' or 'trustworthy'")
+    k = np.trunc(np.nan_to_num(k_dict[k_depth], nan=1, posinf=1, neginf=1))
+    k = np.maximum(k, 1).astype(int)
+
+    # box j, from the quartiles at j = 0 outward, spans the quantiles at
+    # 0.5 ** (j + 2) and 1 - 0.5 ** (j + 2); all groups' letter values and
+    # medians come from one quantile call
+    j = np.arange(k.max() + 1)
+    tails = 0.5 ** (j + 2)
+    q = quantiles(np.concatenate([tails, 1 - tails, [0.5]]))
+    lower, upper, median = q[:, : j.size], q[:, j.size : -1], q[:, -1]
+    valid = j[None, :] <= k[:, None]
+
+    # the width of each box, the widest scaled to 1
+    width_functions = {
+        "linear": lambda h, j, k: (k - j + 1) / k,
+        "exponential": lambda h, j, k: 2.0 ** (-j - 1),
+        "area": lambda h, j, k: (1 - 2.0 ** (-j - 2)) / h,
+    }
+    if scale not in width_functions:
+        raise ValueError("scale must be 'linear', 'exponential' or 'area'")
+    with np.errstate(divide="ignore", invalid="ignore"):
+        w = width_functions[scale](upper - lower, j[None, :], k[:, None])
+    w = np.broadcast_to(w, valid.shape)
+
+    # a box of no height, over a constant stretch of the data, has no
+    # finite 'area' width; it is drawn as a line of the widest width
+    flat = valid & ~np.isfinite(w)
+    w = np.where(valid & ~flat, w, 0)
+    widest = w.max(axis=1, keepdims=True)
+    w = np.where(flat, 1, w / np.where(widest > 0, widest, 1))
+    half_width = widths * w / 2
+
+    # rectangles, outermost first so that inner boxes are drawn on top,
+    # shaded from white outside to the group's color at the quartiles
+    g, d = np.nonzero(valid)
+    order = np.argsort(-d, kind="stable")
+    g, d = g[order], d[order]
+    corners = np.array([-1, 1, 1, -1])
+    vertices = oriented(
+        positions[g, None] + corners * half_width[g, d, None],
+        np.stack([lower[g, d], lower[g, d], upper[g, d], upper[g, d]], axis=1),
+        vert,
+    )
+    shade = ((k[g] - d + 1) / (k[g] + 1))[:, None]
+    facecolors = 1 - shade * (1 - colors[g, :3])
+
+    boxes = PolyCollection(
+        vertices,
+        facecolors=facecolors,
+        edgecolors=[[0, 0, 0, 0.45]],
+        label=label,
+    )
+    ax.add_collection(boxes)
+
+    medians = oriented(
+        positions[:, None] + np.array([-1, 1]) * half_width[:, :1],
+        median[:, None],
+        vert,
+    )
+    ax.add_collection(LineCollection(medians, colors=".15", alpha=0.45))
+
+    # the outliers lie beyond each group's outermost box
+    outermost = (np.arange(n_groups), k)
+    outside = (values < lower[outermost][codes]) | (values > upper[outermost][codes])
+    outliers = oriented(positions[codes[outside]], values[outside], vert)
+    ax.scatter(outliers[:, 0], outliers[:, 1], marker="*", c=colors[codes[outside]])
+
+    ax.autoscale_view()
+    return ax
@@ -1,12 +1,18 @@
 from bplot.check_data import check_data
 from bplot.point import point
 from bplot.line import line_h, line_v
-import numpy as np
+from bplot.summary import summary
 from scipy.stats import norm
 
 
 def mad_std(x):
-    return np.median(np.abs(x - np.median(x)))
+    return summary(x, mad=True)["mad"]
+
+
+def _med_mad(x):
+    """Median and normal consistent median absolute deviation."""
+    s = summary(x, mad=True)
+    return s["median"], s["mad"] / norm.ppf(0.75)
 
 
 def mad(
@@ -62,7 +68,7 @@ def mad(
 
     _, y, ax = check_data(None, y, ax)
 
-    med, mad = np.median(y), mad_std(y) / norm.ppf(0.75)
+    med, mad = _med_mad(y)
 
     lw_mid, uw_mid = med - z_inner * mad, med + z_inner * mad
     lw, uw = med - z * mad, med + z * mad
@@ -124,7 +130,7 @@ def mad_h(
 
     x, _, ax = check_data(x, None, ax)
 
-    med, mad = np.median(x), mad_std(x) / norm.ppf(0.75)
+    med, mad = _med_mad(x)
 
     lw_mid, uw_mid = med - z_inner * mad, med + z_inner * mad
     lw, uw = med - z * mad, med + z * mad
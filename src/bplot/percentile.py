@@ -1,7 +1,7 @@
 from bplot.check_data import check_data
 from bplot.line import line_h, line_v
 from bplot.point import point
-import numpy as np
+from bplot.summary import QuantileSketch, summary
 
 
 def percentile(
@@ -24,8 +24,9 @@ def percentile(
     x : scalar
         The location along the x-axis at which the interval is placed.
 
-    y : {numpy.array, pandas.core.series.Series}
-        The vector of data for which the `outer` percentile interval is sought.
+    y : {numpy.array, pandas.core.series.Series, bplot.QuantileSketch}
+        The vector of data for which the `outer` percentile interval is sought,
+        or a sketch of it.
 
     outer : float, 0.8 by default
         The outer interval percentage.
@@ -57,11 +58,14 @@ def percentile(
         The `Axes` onto which the box was drawn.
     """
 
-    _, y, ax = check_data(None, y, ax)
+    if isinstance(y, QuantileSketch):
+        _, _, ax = check_data(None, None, ax)
+    else:
+        _, y, ax = check_data(None, y, ax)
 
     alpha_l, alpha_lm = (1 - outer) / 2, (1 - inner) / 2
     l, lm, m, um, u = alpha_l, alpha_lm, 0.5, 1 - alpha_lm, 1 - alpha_l
-    q_l, q_lm, q_m, q_um, q_u = np.percentile(y, np.array([l, lm, m, um, u]) * 100)
+    q_l, q_lm, q_m, q_um, q_u = summary(y, [l, lm, m, um, u])["quantiles"]
 
     line_v(x, q_l, q_u, size=2, color=color, alpha=alpha)
     line_v(x, q_lm, q_um, size=5, color=color, alpha=alpha)
@@ -87,8 +91,9 @@ def percentile_h(
 
     Parameters
     ----------
-    x : {numpy.array, pandas.core.series.Series}
-        The vector of data for which the `outer` percentile interval is sought.
+    x : {numpy.array, pandas.core.series.Series, bplot.QuantileSketch}
+        The vector of data for which the `outer` percentile interval is sought,
+        or a sketch of it.
 
     y : int
         The location along the y-axis at which the interval is placed.
@@ -123,11 +128,14 @@ def percentile_h(
         The `Axes` onto which the box was drawn.
     """
 
-    x, _, ax = check_data(x, None, ax)
+    if isinstance(x, QuantileSketch):
+        _, _, ax = check_data(None, None, ax)
+    else:
+        x, _, ax = check_data(x, None, ax)
 
     alpha_l, alpha_lm = (1 - outer) / 2, (1 - inner) / 2
     l, lm, m, um, u = alpha_l, alpha_lm, 0.5, 1 - alpha_lm, 1 - alpha_l
-    q_l, q_lm, q_m, q_um, q_u = np.percentile(x, np.array([l, lm, m, um, u]) * 100)
+    q_l, q_lm, q_m, q_um, q_u = summary(x, [l, lm, m, um, u])["quantiles"]
 
     line_h(y, q_l, q_u, size=2, color=color, alpha=alpha)
     line_h(y, q_lm, q_um, size=5, color=color, alpha=alpha)
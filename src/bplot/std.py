@@ -1,7 +1,7 @@
 from bplot.check_data import check_data
 from bplot.line import line_h, line_v
 from bplot.point import point
-import numpy as np
+from bplot.summary import Moments, summary
 
 
 def std(
@@ -23,8 +23,9 @@ def std(
     x : int
         The location along the x-axis at which the vertical interval is placed.
 
-    y : {numpy.array, pandas.core.series.Series}
-        The vector of data for which the standard deviation is sought.
+    y : {numpy.array, pandas.core.series.Series, bplot.Moments}
+        The vector of data, or its moments, for which the standard
+        deviation is sought.
 
     z : float, 1.96 by default
         The number of standard deviations from the mean for the outer bound.
@@ -55,9 +56,13 @@ def std(
         The `Axes` onto which the box was drawn.
     """
 
-    _, y, ax = check_data(None, y, ax)
+    if isinstance(y, Moments):
+        _, _, ax = check_data(None, None, ax)
+    else:
+        _, y, ax = check_data(None, y, ax)
 
-    ybar, std = np.mean(y), np.std(y)
+    s = summary(y, moments=True)
+    ybar, std = s["mean"], s["std"]
 
     lw_mid, uw_mid = ybar - z_inner * std, ybar + z_inner * std
     lw, uw = ybar - z * std, ybar + z * std
@@ -85,8 +90,9 @@ def std_h(
 
     Parameters
     ----------
-    x : {numpy.array, pandas.core.series.Series}
-        The vector of data for which the standard deviation interval is sought.
+    x : {numpy.array, pandas.core.series.Series, bplot.Moments}
+        The vector of data, or its moments, for which the standard
+        deviation interval is sought.
 
     y : int
         The location along the y-axis at which the vertical interval is placed.
@@ -117,9 +123,13 @@ def std_h(
         The `Axes` onto which the box was drawn.
     """
 
-    x, _, ax = check_data(x, None, ax)
+    if isinstance(x, Moments):
+        _, _, ax = check_data(None, None, ax)
+    else:
+        x, _, ax = check_data(x, None, ax)
 
-    xbar, std = np.mean(x), np.std(x)
+    s = summary(x, moments=True)
+    xbar, std = s["mean"], s["std"]
 
     lw_mid, uw_mid = xbar - z_inner * std, xbar + z_inner * std
     lw, uw = xbar - z * std, xbar + z * std
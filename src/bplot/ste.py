@@ -1,6 +1,7 @@
 from bplot.check_data import check_data
 from bplot.line import line_h, line_v
 from bplot.point import point
+from bplot.summary import Moments, summary
 import numpy as np
 
 
@@ -23,8 +24,9 @@ def ste(
     x : int
         The location along the x-axis at which the vertical interval is placed.
 
-    y : {numpy.array, pandas.core.series.Series}
-        The vector of data for which the standard error is sought.
+    y : {numpy.array, pandas.core.series.Series, bplot.Moments}
+        The vector of data, or its moments, for which the standard
+        error is sought.
 
     z : float, 1.96 by default
         The number of standard deviations from the mean for the outer bound.
@@ -55,9 +57,13 @@ def ste(
         The `Axes` onto which the box was drawn.
     """
 
-    _, y, ax = check_data(None, y, ax)
+    if isinstance(y, Moments):
+        _, _, ax = check_data(None, None, ax)
+    else:
+        _, y, ax = check_data(None, y, ax)
 
-    ybar, ste = np.mean(y), np.std(y) / np.sqrt(len(y))
+    s = summary(y, moments=True)
+    ybar, ste = s["mean"], s["std"] / np.sqrt(s["count"])
 
     lw_mid, uw_mid = ybar - z_inner * ste, ybar + z_inner * ste
     lw, uw = ybar - z * ste, ybar + z * ste
@@ -85,8 +91,9 @@ def ste_h(
 
     Parameters
     ----------
-    x : {numpy.array, pandas.core.series.Series}
-        The vector of data for which the standard error is sought.
+    x : {numpy.array, pandas.core.series.Series, bplot.Moments}
+        The vector of data, or its moments, for which the standard
+        error is sought.
 
     y : int
         The location along the y-axis at which the vertical interval is placed.
@@ -120,9 +127,13 @@ def ste_h(
         The `Axes` onto which the box was drawn.
     """
 
-    x, _, ax = check_data(x, None, ax)
+    if isinstance(x, Moments):
+        _, _, ax = check_data(None, None, ax)
+    else:
+        x, _, ax = check_data(x, None, ax)
 
-    xbar, ste = np.mean(x), np.std(x) / np.sqrt(len(x))
+    s = summary(x, moments=True)
+    xbar, ste = s["mean"], s["std"] / np.sqrt(s["count"])
 
     lw_mid, uw_mid = xbar - z_inner * ste, xbar + z_inner * ste
     lw, uw = xbar - z * ste, xbar + z * ste
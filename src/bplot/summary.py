@@ -0,0 +1,317 @@
+"""Summary statistics shared by the interval plots.
+
+Order statistics are found with a single `numpy.partition` over every
+index they need, rather than one sort or partition per statistic.  Data
+too large to hold at once are summarized by a `QuantileSketch` or by
+`Moments`, which the plots accept in place of the data.
+"""
+
+import numpy as np
+
+
+def summary(x, qs=(), moments=False, mad=False):
+    """Compute the requested summary statistics of a vector.
+
+    Parameters
+    ----------
+    x : {numpy.array, QuantileSketch, Moments}
+        The vector of data, a sketch of it from which only quantiles are
+        available, or its moments.
+
+    qs : sequence of float, () by default
+        The quantile levels sought, between 0 and 1.  Quantiles are
+        interpolated linearly between order statistics, as by
+        `numpy.percentile`.
+
+    moments : bool, False by default
+        Whether to compute the count, mean and standard deviation.
+
+    mad : bool, False by default
+        Whether to compute the median and the median absolute deviation.
+        The median comes from the same partition as the quantiles.
+
+    Returns
+    -------
+    out : dict
+        'quantiles', an array of the quantiles at `qs`; with `moments`,
+        'count', 'mean' and 'std' (with no degrees of freedom correction);
+        with `mad`, 'median' and 'mad' (unscaled).
+    """
+
+    qs = np.asarray(qs, dtype=float).ravel()
+    if np.any((qs < 0) | (qs > 1)):
+        raise ValueError("qs must be between 0 and 1")
+
+    if isinstance(x, QuantileSketch):
+        if moments or mad:
+            raise ValueError("a QuantileSketch has only quantiles")
+        return {"quantiles": x.quantile(qs)}
+
+    if isinstance(x, Moments):
+        if qs.size or mad:
+            raise ValueError("Moments have only the count, mean and std")
+        return {"count": x.count, "mean": x.mean, "std": x.std}
+
+    x = np.asarray(x).ravel()
+    if x.size == 0:
+        raise ValueError("x must not be empty")
+
+    out = {}
+    levels = np.concatenate([qs, [0.5]]) if mad else qs
+    if levels.size:
+        q = quantiles(x, levels)
+        out["quantiles"] = q[: qs.size]
+        if mad:
+            out["median"] = q[-1]
+            out["mad"] = quantiles(np.abs(x - q[-1]), [0.5])[0]
+
+    if moments:
+        mean = x.mean()
+        deviations = x - mean
+        out["count"] = x.size
+        out["mean"] = mean
+        out["std"] = np.sqrt(np.dot(deviations, deviations) / x.size)
+
+    return out
+
+
+def quantiles(x, qs):
+    """Quantiles of x at levels qs, from one partition of x.
+
+    The quantiles are interpolated linearly between order statistics, as by
+    `numpy.percentile`.
+    """
+    x = np.asarray(x).ravel()
+    qs = np.asarray(qs, dtype=float)
+
+    position = qs * (x.size - 1)
+    below = np.floor(position).astype(np.intp)
+    above = np.minimum(below + 1, x.size - 1)
+    fraction = position - below
+
+    partitioned = np.partition(x, np.unique(np.concatenate([below, above])))
+    lower, upper = partitioned[below], partitioned[above]
+    return lower + fraction * (upper - lower)
+
+
+def grouped_quantiles(values, codes, n_groups, qs):
+    """Quantiles of each group of values at levels qs, from one sort of
+    all values by group and then by value.
+
+    The quantiles are interpolated linearly between order statistics, as by
+    `numpy.percentile`.  Returns an (n_groups, len(qs)) array.
+    """
+    order = np.lexsort((values, codes))
+    values = values[order]
+
+    sizes = np.bincount(codes, minlength=n_groups)
+    if np.any(sizes == 0):
+        raise ValueError("each group must have at least one value")
+    starts = (np.cumsum(sizes) - sizes)[:, None]
+
+    position = np.asarray(qs, dtype=float)[None, :] * (sizes[:, None] - 1)
+    below = np.floor(position).astype(np.intp)
+    above = np.minimum(below + 1, sizes[:, None] - 1)
+    fraction = position - below
+
+    lower, upper = values[starts + below], values[starts + above]
+    return lower + fraction * (upper - lower)
+
+
+class QuantileSketch:
+    """Approximate quantiles of data seen in chunks.
+
+    A KLL sketch [1]_ keeps a few hundred of the values seen, each standing
+    in for a power of two of them, so that its size barely grows with the
+    data.  Sketches of separate chunks, say on separate nodes, merge into a
+    sketch of all of them.  The smallest and largest values are kept
+    exactly.
+
+    Parameters
+    ----------
+    k : int, 200 by default
+        The accuracy of the sketch.  Between updates it keeps at most
+        3 * k + 2 * h values, h being its number of levels, about
+        log2(n / k) + 2 for n values seen; usually fewer than 2 * k.  The
+        rank of each quantile is typically off by less than 2 / k of the
+        count.
+
+    random_state : {int, numpy.random.RandomState}, None by default
+        The seed, or generator, of the random choices of the compactions.
+        If None, a generator seeded from the operating system is used, and
+        the same data may get different quantiles from run to run; give a
+        seed to fix them.  NumPy's global generator is never used.
+
+    References
+    ----------
+    .. [1] Karnin, Z., Lang, K. and Liberty, E. (2016) Optimal Quantile
+       Approximation in Streams.  FOCS 2016.
+
+    Examples
+    --------
+    >>> sketch = QuantileSketch()
+    >>> for chunk in chunks:
+    ...     sketch.update(chunk)
+    >>> sketch.merge(other_sketch)
+    >>> percentile(1, sketch)
+    """
+
+    def __init__(self, k=200, random_state=None):
+        if k < 2:
+            raise ValueError("k must be at least 2")
+        self.k = int(k)
+        if not isinstance(random_state, np.random.RandomState):
+            random_state = np.random.RandomState(random_state)
+        self._rng = random_state
+        self.count = 0
+        self.min = np.inf
+        self.max = -np.inf
+        self._levels = [np.zeros(0)]
+
+    def update(self, x):
+        """Add the values of x to the sketch, and return the sketch."""
+        x = np.asarray(x, dtype=float).ravel()
+        if x.size:
+            self.count += x.size
+            self.min = min(self.min, x.min())
+            self.max = max(self.max, x.max())
+            self._levels[0] = np.concatenate([self._levels[0], x])
+            self._compress()
+        return self
+
+    def merge(self, other):
+        """Add the values sketched by other to the sketch, and return the
+        sketch."""
+        if not isinstance(other, QuantileSketch):
+            raise TypeError("other must be a QuantileSketch")
+        for h, level in enumerate(other._levels):
+            if h == len(self._levels):
+                self._levels.append(np.zeros(0))
+            self._levels[h] = np.concatenate([self._levels[h], level])
+        self.count += other.count
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self._compress()
+        return self
+
+    def quantile(self, qs):
+        """Approximate quantiles at levels qs, between 0 and 1."""
+        if self.count == 0:
+            raise ValueError("the sketch is empty")
+        qs = np.asarray(qs, dtype=float)
+
+        values = np.concatenate(self._levels)
+        weights = np.concatenate(
+            [np.full(level.size, 2 ** h) for h, level in enumerate(self._levels)]
+        )
+        order = np.argsort(values)
+        values, ranks = values[order], np.cumsum(weights[order])
+
+        i = np.searchsorted(ranks, qs * (self.count - 1), side="right")
+        out = values[np.minimum(i, values.size - 1)]
+        out = np.where(qs <= 0, self.min, np.where(qs >= 1, self.max, out))
+        return out[()]
+
+    def _capacity(self, h):
+        """The number of values level h holds before it is compacted; lower
+        levels hold geometrically fewer."""
+        depth = len(self._levels) - 1 - h
+        return max(2, int(np.ceil(self.k * (2 / 3) ** depth)))
+
+    def _compress(self):
+        """Compact full levels, lowest first, until none is full.  A
+        compaction sorts a level and promotes every other value, from a
+        random start, to the next level up with twice the weight."""
+        while True:
+            full = [
+                h
+                for h, level in enumerate(self._levels)
+                if level.size > self._capacity(h)
+            ]
+            if not full:
+                return
+            h = full[0]
+            if h + 1 == len(self._levels):
+                self._levels.append(np.zeros(0))
+
+            level = np.sort(self._levels[h])
+            odd = level.size % 2
+            promoted = level[odd + self._rng.randint(2) :: 2]
+            self._levels[h] = level[:odd]
+            self._levels[h + 1] = np.concatenate([self._levels[h + 1], promoted])
+
+
+class Moments:
+    """Count, mean and variance of data seen in chunks.
+
+    The moments of each chunk are merged with those so far by the
+    pairwise formulas of Chan, Golub and LeVeque [1]_, which are as stable
+    as Welford's one value at a time.  Moments of separate chunks, say on
+    separate nodes, merge into the moments of all of them, and convert to
+    and from a dict of three numbers to be sent between them.
+
+    References
+    ----------
+    .. [1] Chan, T. F., Golub, G. H. and LeVeque, R. J. (1979) Updating
+       Formulae and a Pairwise Algorithm for Computing Sample Variances.
+       Technical Report STAN-CS-79-773, Stanford University.
+
+    Examples
+    --------
+    >>> moments = Moments()
+    >>> for chunk in chunks:
+    ...     moments.update(chunk)
+    >>> payload = moments.to_dict()
+    >>> std(1, Moments.from_dict(payload))
+    """
+
+    def __init__(self, count=0, mean=0.0, m2=0.0):
+        self.count = int(count)
+        self.mean = float(mean)
+        self.m2 = float(m2)
+
+    @property
+    def var(self):
+        """The variance, with no degrees of freedom correction."""
+        if self.count == 0:
+            raise ValueError("the moments are of no data")
+        return self.m2 / self.count
+
+    @property
+    def std(self):
+        """The standard deviation, with no degrees of freedom correction."""
+        return np.sqrt(self.var)
+
+    def update(self, x):
+        """Add the values of x, and return the moments."""
+        x = np.asarray(x, dtype=float).ravel()
+        if x.size:
+            mean = x.mean()
+            deviations = x - mean
+            self._merge(x.size, mean, np.dot(deviations, deviations))
+        return self
+
+    def merge(self, other):
+        """Add the values summarized by other, and return the moments."""
+        if not isinstance(other, Moments):
+            raise TypeError("other must be Moments")
+        self._merge(other.count, other.mean, other.m2)
+        return self
+
+    def to_dict(self):
+        """The count, mean and sum of squared deviations, as a dict."""
+        return {"count": self.count, "mean": self.mean, "m2": self.m2}
+
+    @classmethod
+    def from_dict(cls, d):
+        """Moments from the dict of `to_dict`."""
+        return cls(d["count"], d["mean"], d["m2"])
+
+    def _merge(self, count, mean, m2):
+        if count == 0:
+            return
+        total = self.count + count
+        delta = mean - self.mean
+        self.m2 += m2 + delta ** 2 * self.count * count / total
+        self.mean += delta * count / total
+        self.count = total
@@ -4,7 +4,16 @@ import numpy as np
 
 
 def trace(
-    x, color="tab:blue", label="", style="-", size=1.5, alpha=1.0, ax=None, **kws
+    x,
+    color="tab:blue",
+    label="",
+    style="-",
+    size=1.5,
+    alpha=1.0,
+    decimate="minmax",
+    max_points=2 ** 16,
+    ax=None,
+    **kws
 ):
     """Draw trace plot.
 
@@ -28,6 +37,19 @@ def trace(
     alpha : float, 1.0 by default
         The transparency of the color.  Values between 0 (transparent) and 1 (opague) are allowed.
 
+    decimate : {'minmax', 'lttb', None}, 'minmax' by default
+        How a trace of more than `max_points` draws is thinned to about
+        twice as many points as the `Axes` is wide in pixels before it is
+        drawn.  'minmax' keeps the smallest and largest draw of each
+        pixel-wide bucket, which draws the same envelope as the full
+        trace.  'lttb' keeps the draw of each bucket spanning the largest
+        triangle with its neighbors [1]_, which follows the shape of the
+        trace more smoothly.  Either way, the first, last, smallest and
+        largest draws are kept.  If None, every draw is drawn.
+
+    max_points : int, 2 ** 16 by default
+        The number of draws above which the trace is decimated.
+
     ax : matplotlib.pyplot.Axes, None by default
         The axis onto which the box is drawn.  If left as None,
         matplotlib.pyplot.gca() is called to get the current `Axes`.
@@ -38,18 +60,92 @@ def trace(
 
     out : matplotlib.pyplot.Axes
         The `Axes` onto which the box was drawn.
+
+    References
+    ----------
+    .. [1] Steinarsson, S. (2013) Downsampling Time Series for Visual
+       Representation.  MSc thesis, University of Iceland.
     """
 
     x, _, ax = check_data(x, None, ax)
 
+    if decimate not in ("minmax", "lttb", None):
+        raise ValueError("decimate must be 'minmax', 'lttb' or None")
+
+    # two points per pixel column of the axes
+    n_points = max(4, int(2 * ax.bbox.width))
+    if decimate is not None and len(x) > max(max_points, n_points):
+        if decimate == "minmax":
+            draws = _minmax(x, n_points // 2)
+        else:
+            draws = _lttb(x, n_points)
+        x = x[draws]
+    else:
+        draws = np.arange(len(x))
+
     out = line(
-        np.arange(len(x)),
+        draws,
         x,
         color=color,
         label=label,
         style=style,
         size=size,
         alpha=alpha,
+        ax=ax,
         **kws
     )
     return out
+
+
+def _minmax(x, n_buckets):
+    """Indices, in order, of the smallest and largest values of each of
+    n_buckets equal runs of x, and of its first and last values."""
+    n = x.size
+    width = -(-n // n_buckets)
+    n_buckets = -(-n // width)
+
+    # the last bucket is padded with its last value, which changes neither
+    # its smallest nor its largest
+    padded = np.empty(n_buckets * width, dtype=x.dtype)
+    padded[:n] = x
+    padded[n:] = x[-1]
+    buckets = padded.reshape(n_buckets, width)
+
+    offsets = np.arange(n_buckets)[:, None] * width
+    lowest = np.argmin(buckets, axis=1)[:, None]
+    highest = np.argmax(buckets, axis=1)[:, None]
+    draws = offsets + np.hstack([lowest, highest])
+    return np.unique(np.concatenate([[0], np.minimum(draws.ravel(), n - 1), [n - 1]]))
+
+
+def _lttb(x, n_points):
+    """Indices, in order, of about n_points values of x chosen by largest
+    triangle three buckets, and of its smallest and largest values.
+
+    The first and last values are kept, and the rest are split into
+    n_points - 2 buckets.  From each bucket, in order, the value kept is
+    the one spanning the largest triangle with the value kept from the
+    bucket before and the mean of the bucket after.
+    """
+    n = x.size
+    edges = np.linspace(1, n - 1, n_points - 1).astype(int)
+    following = np.append(np.add.reduceat(x[1:-1], edges[:-1] - 1), x[-1])
+    following[:-1] /= np.diff(edges)
+
+    draws = np.empty(n_points, dtype=int)
+    draws[0], draws[-1] = 0, n - 1
+    a = 0
+    for i in range(n_points - 2):
+        lo, hi = edges[i], edges[i + 1]
+        t = np.arange(lo, hi)
+        # the mean position and value of the next bucket
+        if i + 2 < edges.size:
+            t_next = (hi + edges[i + 2] - 1) / 2
+        else:
+            t_next = n - 1
+        x_next = following[i + 1]
+        area = np.abs((a - t_next) * (x[lo:hi] - x[a]) - (a - t) * (x_next - x[a]))
+        a = lo + np.argmax(area)
+        draws[i + 1] = a
+
+    return np.union1d(draws, [np.argmin(x), np.argmax(x)])
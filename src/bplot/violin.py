@@ -1,5 +1,13 @@
-from bplot.check_data import check_data
+from bplot.check_data import (
+    check_colors,
+    check_data,
+    check_groups,
+    check_positions,
+    oriented,
+)
+from bplot.kde import grouped_gaussian_kde_fft
 import matplotlib as mpl
+from matplotlib.collections import PolyCollection
 import numpy as np
 
 
@@ -166,3 +174,248 @@ def violin_h(
         parts["bodies"][0].get_paths()[0].vertices[:, 1] = np.clip(vertices, y, np.inf)
 
     return ax
+
+
+def violins(
+    x,
+    y,
+    by=None,
+    colors=None,
+    alpha=1.0,
+    bw_method=None,
+    n=101,
+    widths=0.5,
+    left_half=True,
+    right_half=True,
+    ax=None,
+    **kws
+):
+    """Draw vertical violin plots of many groups.
+
+    All densities are computed in one binned, FFT smoothed pass and all
+    violins are drawn as a single `PolyCollection`.
+
+    Parameters
+    ----------
+    x : {numpy.array, list, None}
+        The locations along the x-axis at which the violins are placed, one per
+        group.  It may be None, which places the groups at 1, 2, ....
+
+    y : {list, numpy.array, pandas.core.frame.DataFrame, pandas.core.series.Series}
+        The groups of data for which violin plots are sought: a list of
+        vectors, a 2D array or a DataFrame whose columns are the groups,
+        or a vector of data grouped by `by`.  A group of one value, or of
+        constant values, is drawn as a flat sliver at its value.
+
+    by : {numpy.array, pandas.core.series.Series, string}, None by default
+        The group label of each value of `y`, or the name of the column of
+        group labels when `y` is a DataFrame with one other column.
+
+    colors : list, None by default
+        The color of each group's violin, in order of the sorted group
+        labels.  If None, `bplot.colors.color` is cycled through.
+
+    alpha : float, 1.0 by default
+        The transparency of the color.  Values between 0 (transparent) and 1 (opague) are allowed.
+
+    bw_method : string, None by default
+        The bandwidth estimator method.  If None, 'scott' is used.
+
+    n : int, 101 by default
+        The number of interpolation points.
+
+    widths : float, 0.5 by default
+        The largest width of each violin.
+
+    left_half : bool, True by default
+        Whether or not to draw the left half of the violin plots.  Draw
+        only the right halves by setting this to False.
+
+    right_half : bool, True by default
+        Whether or not to draw the right half of the violin plots.  Draw
+        only the left halves by setting this to False.
+
+    ax : matplotlib.pyplot.Axes, None by default
+        The axis onto which the violins are drawn.  If left as None,
+        matplotlib.pyplot.gca() is called to get the current `Axes`.
+
+
+    Returns
+    -------
+    out : matplotlib.collections.PolyCollection
+        The collection holding one violin per group.
+
+    """
+
+    return _violins(
+        x,
+        y,
+        by,
+        colors=colors,
+        alpha=alpha,
+        bw_method=bw_method,
+        n=n,
+        widths=widths,
+        lower=left_half,
+        upper=right_half,
+        vert=True,
+        ax=ax,
+        **kws
+    )
+
+
+def violins_h(
+    x,
+    y,
+    by=None,
+    colors=None,
+    alpha=1.0,
+    bw_method=None,
+    n=101,
+    widths=0.5,
+    top_half=True,
+    bottom_half=True,
+    ax=None,
+    **kws
+):
+    """Draw horizontal violin plots of many groups.
+
+    All densities are computed in one binned, FFT smoothed pass and all
+    violins are drawn as a single `PolyCollection`.
+
+    Parameters
+    ----------
+    x : {list, numpy.array, pandas.core.frame.DataFrame, pandas.core.series.Series}
+        The groups of data for which violin plots are sought: a list of
+        vectors, a 2D array or a DataFrame whose columns are the groups,
+        or a vector of data grouped by `by`.  A group of one value, or of
+        constant values, is drawn as a flat sliver at its value.
+
+    y : {numpy.array, list, None}
+        The locations along the y-axis at which the violins are placed, one per
+        group.  It may be None, which places the groups at 1, 2, ....
+
+    by : {numpy.array, pandas.core.series.Series, string}, None by default
+        The group label of each value of `x`, or the name of the column of
+        group labels when `x` is a DataFrame with one other column.
+
+    colors : list, None by default
+        The color of each group's violin, in order of the sorted group
+        labels.  If None, `bplot.colors.color` is cycled through.
+
+    alpha : float, 1.0 by default
+        The transparency of the color.  Values between 0 (transparent) and 1 (opague) are allowed.
+
+    bw_method : string, None by default
+        The bandwidth estimator method.  If None, 'scott' is used.
+
+    n : int, 101 by default
+        The number of interpolation points.
+
+    widths : float, 0.5 by default
+        The largest height of each violin.
+
+    top_half : bool, True by default
+        Whether or not to draw the top half of the violin plots.  Draw
+        only the bottom halves by setting this to False.
+
+    bottom_half : bool, True by default
+        Whether or not to draw the bottom half of the violin plots.  Draw
+        only the top halves by setting this to False.
+
+    ax : matplotlib.pyplot.Axes, None by default
+        The axis onto which the violins are drawn.  If left as None,
+        matplotlib.pyplot.gca() is called to get the current `Axes`.
+
+
+    Returns
+    -------
+    out : matplotlib.collections.PolyCollection
+        The collection holding one violin per group.
+
+    """
+
+    return _violins(
+        y,
+        x,
+        by,
+        colors=colors,
+        alpha=alpha,
+        bw_method=bw_method,
+        n=n,
+        widths=widths,
+        lower=bottom_half,
+        upper=top_half,
+        vert=False,
+        ax=ax,
+        **kws
+    )
+
+
+def _violins(
+    positions,
+    data,
+    by,
+    colors,
+    alpha,
+    bw_method,
+    n,
+    widths,
+    lower,
+    upper,
+    vert,
+    ax,
+    **kws
+):
+    """Draw violins of grouped data, the lower/upper halves below/above
+    each position across the violin's axis."""
+
+    values, codes, labels = check_groups(data, by)
+    _, _, ax = check_data(None, None, ax)
+    n_groups = labels.size
+
+    positions = check_positions(positions, n_groups)
+
+    if np.any(np.bincount(codes, minlength=n_groups) == 0):
+        raise ValueError("each group must have at least one value")
+
+    lo = np.full(n_groups, np.inf)
+    hi = np.full(n_groups, -np.inf)
+    np.minimum.at(lo, codes, values)
+    np.maximum.at(hi, codes, values)
+
+    # a group of one value, or of constant values, has no spread to smooth;
+    # like matplotlib's violinplot, it is drawn as a flat sliver at its value
+    density = np.ones((n_groups, n))
+    spread = lo < hi
+    if spread.any():
+        kept = spread[codes]
+        density[spread] = grouped_gaussian_kde_fft(
+            values[kept],
+            (np.cumsum(spread) - 1)[codes[kept]],
+            np.count_nonzero(spread),
+            lo[spread],
+            hi[spread],
+            n,
+            bw_method,
+        )
+    half_width = 0.5 * widths * density / density.max(axis=1, keepdims=True)
+
+    # outline up one side of each violin and back down the other
+    along = np.linspace(lo, hi, n, axis=1)
+    across = np.concatenate(
+        [
+            positions[:, None] + upper * half_width,
+            (positions[:, None] - lower * half_width)[:, ::-1],
+        ],
+        axis=1,
+    )
+    along = np.concatenate([along, along[:, ::-1]], axis=1)
+    vertices = oriented(across, along, vert)
+
+    colors = check_colors(colors, n_groups)
+
+    out = PolyCollection(vertices, facecolors=colors, alpha=alpha, **kws)
+    ax.add_collection(out)
+    ax.autoscale_view()
+    return out
@@ -0,0 +1,77 @@
+import numpy as np
+import pytest
+
+from bplot.autocorrelation import effective_sample_size
+
+
+def reference_effective_sample_size(draws):
+    """A line by line port of Stan's compute_effective_sample_size, with
+    the autocovariances summed directly.  Returns the effective sample
+    size and tau_hat."""
+    M, N = draws.shape
+    acov = np.array(
+        [
+            np.correlate(c, c, "full")[N - 1 :] / N
+            for c in draws - draws.mean(1)[:, None]
+        ]
+    )
+    mean_var = np.mean(acov[:, 0]) * N / (N - 1)
+    var_plus = mean_var * (N - 1) / N
+    if M > 1:
+        var_plus += np.var(draws.mean(axis=1), ddof=1)
+
+    rho_hat_s = np.zeros(N)
+    rho_hat_even = 1.0
+    rho_hat_s[0] = rho_hat_even
+    rho_hat_odd = 1 - (mean_var - np.mean(acov[:, 1])) / var_plus
+    rho_hat_s[1] = rho_hat_odd
+
+    s = 1
+    while s < N - 4 and rho_hat_even + rho_hat_odd > 0:
+        rho_hat_even = 1 - (mean_var - np.mean(acov[:, s + 1])) / var_plus
+        rho_hat_odd = 1 - (mean_var - np.mean(acov[:, s + 2])) / var_plus
+        if rho_hat_even + rho_hat_odd >= 0:
+            rho_hat_s[s + 1] = rho_hat_even
+            rho_hat_s[s + 2] = rho_hat_odd
+        s += 2
+
+    max_s = s
+    if rho_hat_even > 0:
+        rho_hat_s[max_s + 1] = rho_hat_even
+
+    for s in range(1, max_s - 2, 2):
+        if rho_hat_s[s + 1] + rho_hat_s[s + 2] > rho_hat_s[s - 1] + rho_hat_s[s]:
+            rho_hat_s[s + 1] = (rho_hat_s[s - 1] + rho_hat_s[s]) / 2
+            rho_hat_s[s + 2] = rho_hat_s[s + 1]
+
+    total = M * N
+    tau_hat = -1 + 2 * rho_hat_s[:max_s].sum() + rho_hat_s[max_s + 1]
+    return min(total / tau_hat, total * np.log10(total)), tau_hat
+
+
+def ar1(phi, M, N, rng):
+    e = rng.normal(size=(M, N))
+    x = np.zeros((M, N))
+    x[:, 0] = e[:, 0]
+    for i in range(1, N):
+        x[:, i] = phi * x[:, i - 1] + e[:, i]
+    return x
+
+
+@pytest.mark.parametrize("phi", [-0.5, 0, 0.5, 0.9, 0.95])
+@pytest.mark.parametrize("M", [1, 4])
+@pytest.mark.parametrize("N", [100, 1001])
+def test_effective_sample_size_matches_stan(phi, M, N):
+    x = ar1(phi, M, N, np.random.RandomState(0))
+    expected, tau_hat = reference_effective_sample_size(x)
+    assert tau_hat > 0
+    np.testing.assert_allclose(effective_sample_size(x), expected, rtol=1e-12)
+
+
+@pytest.mark.parametrize("M", [1, 4])
+def test_effective_sample_size_bounds_antithetic_chains(M):
+    # Stan's tau_hat is negative here, and so is its effective sample size
+    x = ar1(-0.9, M, 1000, np.random.RandomState(1))
+    stan, tau_hat = reference_effective_sample_size(x)
+    assert tau_hat < 0 and stan < 0
+    assert effective_sample_size(x) == pytest.approx(M * 1000 * np.log10(M * 1000))
@@ -0,0 +1,203 @@
+import numpy as np
+import pytest
+
+import bplot.bayesian_blocks as bayesian_blocks_module
+from bplot.bayesian_blocks import (
+    Events,
+    PointMeasures,
+    RegularEvents,
+    bayesian_blocks,
+)
+
+
+def reference_bayesian_blocks(t, x, sigma, fitfunc):
+    """The original quadratic loop, which rebuilds every block statistic
+    with a reversed cumulative sum for each cell.  t must be sorted and
+    unique."""
+    N = t.size
+    if "a_k" in fitfunc.args:
+        ak_raw = np.ones_like(x) / sigma / sigma
+    if "b_k" in fitfunc.args:
+        bk_raw = x / sigma / sigma
+    if "c_k" in fitfunc.args:
+        ck_raw = x * x / sigma / sigma
+
+    edges = np.concatenate([t[:1], 0.5 * (t[1:] + t[:-1]), t[-1:]])
+    block_length = t[-1] - edges
+
+    best = np.zeros(N, dtype=float)
+    last = np.zeros(N, dtype=int)
+    for R in range(N):
+        kwds = {}
+        if "T_k" in fitfunc.args:
+            kwds["T_k"] = block_length[: R + 1] - block_length[R + 1]
+        if "N_k" in fitfunc.args:
+            kwds["N_k"] = np.cumsum(x[: R + 1][::-1])[::-1]
+        if "a_k" in fitfunc.args:
+            kwds["a_k"] = 0.5 * np.cumsum(ak_raw[: R + 1][::-1])[::-1]
+        if "b_k" in fitfunc.args:
+            kwds["b_k"] = -np.cumsum(bk_raw[: R + 1][::-1])[::-1]
+        if "c_k" in fitfunc.args:
+            kwds["c_k"] = 0.5 * np.cumsum(ck_raw[: R + 1][::-1])[::-1]
+
+        A_R = fitfunc.fitness(**kwds) - fitfunc.prior(R + 1, N)
+        A_R[1:] += best[:R]
+
+        i_max = np.argmax(A_R)
+        last[R] = i_max
+        best[R] = A_R[i_max]
+
+    change_points = [N]
+    while change_points[-1] != 0:
+        change_points.append(last[change_points[-1] - 1])
+    return edges[change_points[::-1]]
+
+
+def events_data(rng):
+    t = np.round(rng.normal(size=rng.randint(5, 400)), 2)
+    return {"t": t}, {"p0": 0.01}
+
+
+def regular_events_data(rng):
+    dt = 0.01
+    t = dt * np.arange(rng.randint(50, 600))
+    x = (rng.rand(t.size) < np.where(t > t.mean(), 0.6, 0.1)).astype(float)
+    return {"t": t, "x": x}, {"dt": dt, "p0": 0.05}
+
+
+def measures_data(rng):
+    t = 100 * rng.rand(rng.randint(20, 300))
+    x = rng.normal(np.exp(-0.5 * (t - 50) ** 2 / 50), 0.1)
+    return {"t": t, "x": x, "sigma": 0.1}, {}
+
+
+DATA = {
+    "events": (events_data, Events),
+    "regular_events": (regular_events_data, RegularEvents),
+    "measures": (measures_data, PointMeasures),
+}
+
+
+# the first and last cells are half a tick wide, so regular events in them
+# warn of N/M > 1
+@pytest.mark.filterwarnings("ignore::RuntimeWarning", "ignore::UserWarning")
+@pytest.mark.parametrize("fitness", sorted(DATA))
+@pytest.mark.parametrize("seed", range(10))
+def test_methods_match_reference(fitness, seed):
+    make_data, fitness_class = DATA[fitness]
+    data, kwargs = make_data(np.random.RandomState(seed))
+
+    t, counts = np.unique(data["t"], return_counts=True)
+    x = data.get("x", counts)
+    if "x" in data:
+        x = x[np.argsort(data["t"])]
+    sigma = data.get("sigma", 1)
+    expected = reference_bayesian_blocks(t, x, sigma, fitness_class(**kwargs))
+
+    for method in ("exact", "pelt"):
+        edges = bayesian_blocks(fitness=fitness, method=method, **data, **kwargs)
+        assert edges.shape == expected.shape
+        np.testing.assert_allclose(edges, expected, rtol=0, atol=1e-12)
+
+
+@pytest.mark.filterwarnings("ignore::RuntimeWarning", "ignore::UserWarning")
+@pytest.mark.parametrize("fitness", sorted(DATA))
+@pytest.mark.parametrize("seed", range(10))
+def test_pelt_matches_exact_with_constraints(fitness, seed):
+    make_data, _ = DATA[fitness]
+    data, kwargs = make_data(np.random.RandomState(seed))
+    span = np.ptp(data["t"])
+
+    for constraints in ({"min_width": span / 20}, {"max_blocks": 3}):
+        exact = bayesian_blocks(
+            fitness=fitness, method="exact", **data, **kwargs, **constraints
+        )
+        pelt = bayesian_blocks(
+            fitness=fitness, method="pelt", **data, **kwargs, **constraints
+        )
+        np.testing.assert_array_equal(pelt, exact)
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_max_blocks_is_optimal_among_few_blocks(seed):
+    rng = np.random.RandomState(seed)
+    t = np.sort(rng.choice(np.round(rng.normal(size=40), 2), 11, replace=False))
+    fitfunc = Events(p0=2)
+    edges = np.concatenate([t[:1], 0.5 * (t[1:] + t[:-1]), t[-1:]])
+    N = t.size
+
+    def score(points):
+        blocks = zip(points[:-1], points[1:])
+        return sum(
+            fitfunc.fitness(N_k=float(j - i), T_k=edges[j] - edges[i])
+            - fitfunc.prior(j, N)
+            for i, j in blocks
+        )
+
+    # every partition of the cells, by the cells which start a block
+    partitions = [
+        np.concatenate([[0], np.flatnonzero(mask) + 1, [N]])
+        for mask in (np.arange(2 ** (N - 1))[:, None] >> np.arange(N - 1)) & 1
+    ]
+    for max_blocks in (1, 2, 3, 4):
+        allowed = [p for p in partitions if p.size - 1 <= max_blocks]
+        expected = max(score(p) for p in allowed)
+        for method in ("exact", "pelt"):
+            found = bayesian_blocks(t, p0=2, method=method, max_blocks=max_blocks)
+            assert found.size - 1 <= max_blocks
+            points = np.searchsorted(edges, found)
+            np.testing.assert_allclose(score(points), expected, rtol=1e-12)
+
+
+def test_grid_rejects_fitness_objects():
+    t = np.random.RandomState(0).normal(size=100)
+    with pytest.raises(ValueError, match="grid"):
+        bayesian_blocks(t, fitness=Events(), grid=10)
+
+
+def test_max_blocks_merges_blocks_at_realistic_sizes(monkeypatch):
+    rng = np.random.RandomState(0)
+    rates = rng.randint(1, 20, size=100)
+    t = np.concatenate([i + rng.rand(r * 40) for i, r in enumerate(rates)])
+    free = bayesian_blocks(t, method="pelt")
+
+    # the block count is searched over a subset of the events
+    sizes = []
+    search_blocks = bayesian_blocks_module._search_blocks
+
+    def recorded(fitfunc, edges, *args, **kwargs):
+        sizes.append(edges.size)
+        return search_blocks(fitfunc, edges, *args, **kwargs)
+
+    monkeypatch.setattr(bayesian_blocks_module, "_search_blocks", recorded)
+    edges = bayesian_blocks(t, method="pelt", max_blocks=20)
+    assert t.size > 30000 and free.size - 1 > 20
+    assert len(sizes) == 1 and sizes[0] < t.size / 10
+    assert edges.size - 1 == 20
+
+
+@pytest.mark.parametrize("max_blocks", [3, 5, 10])
+def test_max_blocks_approximation_is_close_to_exact(monkeypatch, max_blocks):
+    rng = np.random.RandomState(1)
+    t = np.concatenate([rng.normal(size=1500), rng.standard_cauchy(size=1500)])
+    t = np.unique(t[np.abs(t) < 50])
+    fitfunc = Events()
+    cells = np.concatenate([t[:1], 0.5 * (t[1:] + t[:-1]), t[-1:]])
+
+    def score(edges):
+        points = np.searchsorted(cells, edges)
+        return sum(
+            fitfunc.fitness(N_k=float(j - i), T_k=cells[j] - cells[i])
+            - fitfunc.prior(j, t.size)
+            for i, j in zip(points[:-1], points[1:])
+        )
+
+    exact = bayesian_blocks(t, method="pelt", max_blocks=max_blocks)
+
+    # search over 300 of the cells rather than all of them
+    work = 300 * 300 * max_blocks
+    monkeypatch.setattr(bayesian_blocks_module, "_EXACT_BLOCKS_WORK", work)
+    approximate = bayesian_blocks(t, method="pelt", max_blocks=max_blocks)
+    assert approximate.size - 1 == max_blocks
+    assert score(approximate) <= score(exact)
+    np.testing.assert_allclose(score(approximate), score(exact), rtol=1e-3)
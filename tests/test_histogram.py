@@ -0,0 +1,28 @@
+import matplotlib.pyplot as plt
+import numpy as np
+import pytest
+
+from bplot.histogram import histogram, histogram_binned
+
+
+def test_histogram_binned_blocks_use_the_given_edges():
+    # two full bins either side of empty bins of uneven widths
+    counts = np.array([0, 20, 0, 0, 20, 0])
+    edges = np.array([-1, 0, 1, 6, 9, 10, 11])
+    _, ax = plt.subplots()
+    n, bins, _ = histogram_binned(counts, edges, density=False, bins="bb", ax=ax)
+    plt.close(ax.figure)
+
+    np.testing.assert_array_equal(bins, [0, 1, 9, 10])
+    np.testing.assert_array_equal(n, [20, 0, 20])
+
+
+def test_histogram_binned_blocks_reject_weights():
+    with pytest.raises(ValueError, match="whole numbers"):
+        histogram_binned([1.5, 2], [0, 1, 2], bins="bb")
+
+
+def test_histogram_rejects_return_error():
+    x = np.random.RandomState(0).normal(size=100)
+    with pytest.raises(TypeError, match="return_error"):
+        histogram(x, bins="bb", grid=10, return_error=True)
@@ -0,0 +1,49 @@
+import numpy as np
+import pytest
+from scipy import stats
+
+from bplot.kde import gaussian_kde_fft, grouped_gaussian_kde_fft
+
+
+def silverman_factor(kde):
+    return kde.silverman_factor()
+
+
+BW_METHODS = [None, "scott", "silverman", 0.3, silverman_factor]
+
+
+def samples():
+    rng = np.random.RandomState(0)
+    yield rng.normal(size=2000)
+    yield np.concatenate([rng.normal(-3, 0.5, size=500), rng.normal(2, 1, 1500)])
+    yield rng.gamma(2, size=5000)
+
+
+@pytest.mark.parametrize("bw_method", BW_METHODS)
+@pytest.mark.parametrize("n", [101, 512])
+def test_gaussian_kde_fft_matches_scipy(bw_method, n):
+    for x in samples():
+        xs = np.linspace(x.min(), x.max(), n)
+        expected = stats.gaussian_kde(x, bw_method)(xs)
+        density = gaussian_kde_fft(x, x.min(), x.max(), n, bw_method)
+
+        # the documented tolerance, 0.1% of the peak density
+        np.testing.assert_allclose(
+            density, expected, rtol=0, atol=1e-3 * expected.max()
+        )
+
+
+@pytest.mark.parametrize("bw_method", BW_METHODS)
+def test_grouped_gaussian_kde_fft_matches_scipy(bw_method):
+    groups = list(samples())
+    x = np.concatenate(groups)
+    codes = np.repeat(np.arange(len(groups)), [g.size for g in groups])
+    lo = np.array([g.min() for g in groups])
+    hi = np.array([g.max() for g in groups])
+
+    density = grouped_gaussian_kde_fft(x, codes, len(groups), lo, hi, 101, bw_method)
+    for g, group in enumerate(groups):
+        expected = stats.gaussian_kde(group, bw_method)(np.linspace(lo[g], hi[g], 101))
+        np.testing.assert_allclose(
+            density[g], expected, rtol=0, atol=1e-3 * expected.max()
+        )